@@ -0,0 +1,85 @@
+"""Per-step request assembly overhead against session history length.
+
+Builds sessions with a growing number of events and times
+ToolCallingAgent._prepare_llm_request, next to the previous approach of
+re-flattening every event and re-validating the request on every step.
+No LLM calls are made.
+
+Run from the repository root:
+    python -m benchmarks.request_assembly_benchmark
+"""
+
+import asyncio
+import time
+
+from scratch_agents.agents.execution_context_ch6 import ExecutionContext
+from scratch_agents.agents.tool_calling_agent_ch6 import ToolCallingAgent
+from scratch_agents.models.llm_request import LlmRequest
+from scratch_agents.sessions.in_memory_session_manager import InMemorySessionManager
+from scratch_agents.tools.decorator import tool
+from scratch_agents.types.contents import Message, ToolCall, ToolResult
+from scratch_agents.types.events import Event
+
+HISTORY_LENGTHS = [10, 100, 1_000, 10_000]
+REPEATS = 200
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look up a value"""
+    return query
+
+
+def build_context(agent: ToolCallingAgent, num_events: int) -> ExecutionContext:
+    session_manager = InMemorySessionManager()
+    session = session_manager.create_session("bench", "bench-user")
+    context = ExecutionContext(
+        session=session,
+        session_manager=session_manager,
+        cross_session_manager=None,
+    )
+    for i in range(num_events):
+        if i % 3 == 0:
+            content = [Message(role="user", content=f"question {i}")]
+        elif i % 3 == 1:
+            content = [ToolCall(tool_call_id=f"call_{i}", name="lookup", arguments={"query": str(i)})]
+        else:
+            content = [ToolResult(tool_call_id=f"call_{i - 1}", name="lookup", status="success", content=str(i))]
+        context.add_event(Event(execution_id=context.execution_id, author=agent.name, content=content))
+    return context
+
+
+def full_rebuild(agent: ToolCallingAgent, context: ExecutionContext) -> LlmRequest:
+    """The previous assembly: flatten all events and validate on every step"""
+    flat_contents = []
+    for event in context.events:
+        flat_contents.extend(event.content)
+    return LlmRequest(
+        instructions=[agent.instructions] if agent.instructions else [],
+        contents=flat_contents,
+        tools_dict={t.name: t for t in agent.tools.values() if t.tool_definition},
+    )
+
+
+async def main():
+    agent = ToolCallingAgent(name="bench", model=None, tools=[lookup], instructions="Benchmark")
+
+    print(f"{'events':>8} {'incremental (us)':>18} {'full rebuild (us)':>18}")
+    for num_events in HISTORY_LENGTHS:
+        context = build_context(agent, num_events)
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            await agent._prepare_llm_request(context)
+        incremental = (time.perf_counter() - start) / REPEATS * 1e6
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            full_rebuild(agent, context)
+        rebuild = (time.perf_counter() - start) / REPEATS * 1e6
+
+        print(f"{num_events:>8} {incremental:>18.1f} {rebuild:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
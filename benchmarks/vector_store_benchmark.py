@@ -0,0 +1,88 @@
+"""Query latency of the memory vector stores against the number of memories.
+
+Fills each store with random unit vectors spread over NUM_USERS users and
+times top-5 queries, unfiltered and filtered to one user. ChromaDB is
+included when it is installed. No embedding calls are made.
+
+Run from the repository root:
+    python -m benchmarks.vector_store_benchmark
+    python -m benchmarks.vector_store_benchmark --sizes 10000 100000 --dim 1536
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from scratch_agents.sessions.vector_store import ChromaVectorStore, LocalVectorStore
+
+SIZES = [10_000, 100_000, 1_000_000]
+NUM_USERS = 100
+INSERT_BATCH = 5_000
+QUERIES = 50
+TOP_K = 5
+
+
+def fill(store, size: int, dim: int, rng: np.random.Generator) -> float:
+    """Insert size random memories; returns the seconds taken"""
+    start = time.perf_counter()
+    for offset in range(0, size, INSERT_BATCH):
+        count = min(INSERT_BATCH, size - offset)
+        store.upsert(
+            ids=[f"m{offset + i}" for i in range(count)],
+            documents=[f"memory {offset + i}" for i in range(count)],
+            embeddings=rng.standard_normal((count, dim), dtype=np.float32).tolist(),
+            metadatas=[{"user_id": f"u{(offset + i) % NUM_USERS}"} for i in range(count)],
+        )
+    return time.perf_counter() - start
+
+
+def time_queries(store, queries: np.ndarray, where=None) -> float:
+    """Mean milliseconds of one single-embedding query"""
+    start = time.perf_counter()
+    for query in queries:
+        store.query(query_embeddings=[query.tolist()], n_results=TOP_K, where=where)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def store_factories():
+    """Constructors of the stores to compare, each taking a directory"""
+    factories = {"local": lambda directory: LocalVectorStore(f"{directory}/local")}
+    try:
+        import chromadb  # noqa: F401
+        factories["chroma"] = lambda directory: ChromaVectorStore(f"{directory}/chroma", "benchmark")
+    except ImportError:
+        print("chromadb is not installed; benchmarking the local store only")
+    return factories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((QUERIES, args.dim), dtype=np.float32)
+    factories = store_factories()
+
+    print(f"{'store':>8} {'memories':>10} {'insert (s)':>11} {'query (ms)':>11} {'per-user query (ms)':>20}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix="vector_store_benchmark_")
+        try:
+            for name, make_store in factories.items():
+                store = make_store(directory)
+                insert_seconds = fill(store, size, args.dim, rng)
+                unfiltered = time_queries(store, queries)
+                per_user = time_queries(store, queries, where={"user_id": "u0"})
+                print(f"{name:>8} {size:>10} {insert_seconds:>11.1f} {unfiltered:>11.2f} {per_user:>20.2f}")
+                if isinstance(store, LocalVectorStore):
+                    store.close()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import fitz  # pymupdf
+import asyncio
 import base64
 from pathlib import Path
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from scratch_agents.models.http_pool import get_client_registry
+
 load_dotenv()
 
 IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp']
@@ -11,29 +13,34 @@ AUDIO_EXTENSIONS = ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.webm']
 PDF_EXTENSIONS = ['.pdf']
 
 
-def read_media_file(file_path: str, query: str) -> str:
+async def read_media_file(file_path: str, query: str) -> str:
     """Analyze an image, audio, or PDF file using LLM."""
 
     ext = Path(file_path).suffix.lower()
     if ext in IMAGE_EXTENSIONS:
-        return _analyze_image(file_path, query)
+        return await _analyze_image(file_path, query)
     elif ext in AUDIO_EXTENSIONS:
-        return _analyze_audio(file_path, query)
+        return await _analyze_audio(file_path, query)
     elif ext in PDF_EXTENSIONS:
-        return _analyze_pdf(file_path, query)
+        return await _analyze_pdf(file_path, query)
     else:
         return f"Unsupported media format: {ext}"
 
 
-def _analyze_image(file_path: str, query: str) -> str:
+def _read_base64(file_path: str) -> str:
     with open(file_path, 'rb') as f:
-        image_data = base64.b64encode(f.read()).decode("utf-8")
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
+async def _analyze_image(file_path: str, query: str) -> str:
+    image_data = await asyncio.to_thread(_read_base64, file_path)
 
     ext = Path(file_path).suffix.lower().lstrip('.')
     media_type = "image/jpeg" if ext == "jpg" else f"image/{ext}"
 
-    client = OpenAI()
-    response = client.chat.completions.create(
+    # Shared, pooled client instead of a new connection per call
+    client = get_client_registry().openai_client()
+    response = await client.chat.completions.create(
         model="gpt-4o",
         messages=[{
             "role": "user",
@@ -49,12 +56,11 @@ def _analyze_image(file_path: str, query: str) -> str:
     return response.choices[0].message.content
 
 
-def _analyze_audio(file_path: str, query: str) -> str:
-    with open(file_path, "rb") as f:
-        audio_data = base64.b64encode(f.read()).decode("utf-8")
+async def _analyze_audio(file_path: str, query: str) -> str:
+    audio_data = await asyncio.to_thread(_read_base64, file_path)
     ext = Path(file_path).suffix.lower().lstrip('.')
-    client = OpenAI()
-    response = client.chat.completions.create(
+    client = get_client_registry().openai_client()
+    response = await client.chat.completions.create(
         model="gpt-4o-audio-preview",
         messages=[{
             "role": "user",
@@ -71,30 +77,37 @@ def _analyze_audio(file_path: str, query: str) -> str:
     return response.choices[0].message.content
 
 
-def _analyze_pdf(file_path: str, query: str) -> str:
+def _render_pdf(file_path: str, query: str) -> list:
+    """Extract the text and render the first pages of a PDF as PNG images"""
     doc = fitz.open(file_path)
     # Extract text for context
     text_content = ""
     for page in doc:
         text_content += page.get_text()
-        # Convert pages to images
-        images = []
-        for page in doc[:5]:  # First 5 pages
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img_bytes = pix.tobytes("png")
-            images.append(base64.b64encode(img_bytes).decode('utf-8'))
-            # Build content with text and images
-            content = [{
-                "type": "text",
-                "text": f"{query}\n\nExtracted text:\n{text_content[:3000]}"
-            }]
-            for img_b64 in images:
-                content.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{img_b64}"}
-                })
-    client = OpenAI()
-    response = client.chat.completions.create(
+    # Convert pages to images
+    images = []
+    for page in doc[:5]:  # First 5 pages
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+        img_bytes = pix.tobytes("png")
+        images.append(base64.b64encode(img_bytes).decode('utf-8'))
+    # Build content with text and images
+    content = [{
+        "type": "text",
+        "text": f"{query}\n\nExtracted text:\n{text_content[:3000]}"
+    }]
+    for img_b64 in images:
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/png;base64,{img_b64}"}
+        })
+    return content
+
+
+async def _analyze_pdf(file_path: str, query: str) -> str:
+    # Rendering is CPU-bound, keep it off the event loop
+    content = await asyncio.to_thread(_render_pdf, file_path, query)
+    client = get_client_registry().openai_client()
+    response = await client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": content}]
     )
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackgroundTaskStats:
+    """Counters of a BackgroundTaskRunner"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    running: int = 0
+    max_queue_depth: int = 0
+    total_seconds: float = 0.0
+    last_error: Optional[str] = None
+
+    @property
+    def mean_seconds(self) -> float:
+        finished = self.completed + self.failed
+        return self.total_seconds / finished if finished else 0.0
+
+
+class BackgroundTaskRunner:
+    """Run fire-and-forget work, such as after-run callbacks, off the request path
+
+    Jobs wait in a bounded queue and run on max_concurrency workers. When
+    the queue is full, submit() waits, which applies back-pressure instead
+    of letting work pile up. Failures are logged and counted, never raised
+    to the submitter. Call drain() before shutting down.
+
+    Example:
+        runner = BackgroundTaskRunner(max_concurrency=4)
+        await runner.submit(lambda: manager.process_session(session, execution_id, raise_errors=True))
+        await runner.drain()
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue_size: int = 100):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.stats = BackgroundTaskStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, job: Callable[[], Awaitable], name: str = "background task") -> None:
+        """Queue a coroutine function; returns once the job is queued, not when it finishes"""
+        self._start_workers()
+        await self._queue.put((job, name))
+        self.stats.submitted += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queue.qsize())
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job has finished
+
+        Returns:
+            False if the timeout expired first
+        """
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Drain the queue, then stop the workers"""
+        await self.drain(timeout)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def _start_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+
+    async def _work(self) -> None:
+        while True:
+            job, name = await self._queue.get()
+            self.stats.running += 1
+            start = time.monotonic()
+            try:
+                await job()
+                self.stats.completed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                self.stats.last_error = f"{name}: {e}"
+                logger.exception(f"Background task failed: {name}")
+            finally:
+                self.stats.running -= 1
+                self.stats.total_seconds += time.monotonic() - start
+                self._queue.task_done()
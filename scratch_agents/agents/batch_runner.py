@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+@dataclass
+class BatchItemResult:
+    """Result of one input in a batch"""
+    item_id: str
+    input: str
+    output: Any = None
+    error: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    duration: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchReport:
+    """Summary of a batch run"""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    elapsed_seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Completed items per second"""
+        completed = self.succeeded + self.failed
+        return completed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Batch: {self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.skipped} resumed from checkpoint, {self.total} total\n"
+            f"Elapsed: {self.elapsed_seconds:.1f}s ({self.throughput:.2f} items/s)\n"
+            f"Tokens: {self.input_tokens} input, {self.output_tokens} output"
+        )
+
+
+class BatchRun:
+    """Run an agent over many inputs with bounded concurrency
+
+    Each input runs in its own session, deleted once the item finishes.
+    Results are yielded as they complete and, when checkpoint_path is set,
+    appended to a JSONL file so a crashed batch can be restarted and skip
+    the items that already succeeded.
+
+    Example:
+        batch = agent.run_batch(inputs, concurrency=16, checkpoint_path="run.jsonl")
+        async for result in batch:
+            ...
+        print(batch.report)
+    """
+
+    def __init__(
+        self,
+        agent,
+        inputs,
+        concurrency: int = 8,
+        checkpoint_path: Optional[str] = None,
+        user_id: str = "batch",
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.agent = agent
+        self.items = self._normalize_inputs(inputs)
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.user_id = user_id
+        self.batch_id = str(uuid.uuid4())
+        self.report = BatchReport(total=len(self.items))
+
+    def __aiter__(self):
+        return self._run()
+
+    async def _run(self):
+        completed = self._load_checkpoint()
+        pending = [(item_id, text) for item_id, text in self.items if item_id not in completed]
+        self.report.skipped = len(self.items) - len(pending)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        results: asyncio.Queue = asyncio.Queue()
+
+        checkpoint = open(self.checkpoint_path, "a", encoding="utf-8") if self.checkpoint_path else None
+        workers = [
+            asyncio.create_task(self._worker(queue, results))
+            for _ in range(min(self.concurrency, len(pending)))
+        ]
+        start = time.perf_counter()
+        try:
+            for _ in range(len(pending)):
+                result = await results.get()
+                self._record(result)
+                if checkpoint:
+                    checkpoint.write(self._checkpoint_line(result) + "\n")
+                    checkpoint.flush()
+                yield result
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if checkpoint:
+                checkpoint.close()
+            self.report.elapsed_seconds = time.perf_counter() - start
+
+    async def _worker(self, queue: asyncio.Queue, results: asyncio.Queue) -> None:
+        while True:
+            try:
+                item_id, text = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await results.put(await self._run_item(item_id, text))
+
+    async def _run_item(self, item_id: str, text: str) -> BatchItemResult:
+        result = BatchItemResult(item_id=item_id, input=text)
+        session_id = f"{self.batch_id}-{item_id}"
+        start = time.perf_counter()
+        try:
+            context = await self.agent.execute(
+                text,
+                user_id=self.user_id,
+                session_id=session_id,
+            )
+            result.output = context.final_result
+            for event in context.events:
+                if event.execution_id == context.execution_id:
+                    result.input_tokens += event.usage_metadata.get("input_tokens") or 0
+                    result.output_tokens += event.usage_metadata.get("output_tokens") or 0
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            # Batch sessions are never resumed; don't keep one per item
+            self.agent.session_manager.delete_session(session_id)
+        result.duration = time.perf_counter() - start
+        return result
+
+    def _record(self, result: BatchItemResult) -> None:
+        if result.succeeded:
+            self.report.succeeded += 1
+        else:
+            self.report.failed += 1
+            self.report.errors[result.item_id] = result.error
+        self.report.input_tokens += result.input_tokens
+        self.report.output_tokens += result.output_tokens
+
+    def _load_checkpoint(self) -> set:
+        """Return the ids of items that already succeeded in a previous run"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        completed = set()
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from a crash
+                    continue
+                if record.get("error") is None:
+                    completed.add(record["item_id"])
+        return completed
+
+    def _checkpoint_line(self, result: BatchItemResult) -> str:
+        output = result.output
+        if isinstance(output, BaseModel):
+            output = output.model_dump(mode="json")
+        return json.dumps({
+            "item_id": result.item_id,
+            "input": result.input,
+            "output": output,
+            "error": result.error,
+            "input_tokens": result.input_tokens,
+            "output_tokens": result.output_tokens,
+        }, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _normalize_inputs(inputs) -> List[Tuple[str, str]]:
+        """Accept a mapping of id -> input or a sequence of inputs (ids are positions)"""
+        if isinstance(inputs, Mapping):
+            return [(str(item_id), text) for item_id, text in inputs.items()]
+        return [(str(i), text) for i, text in enumerate(inputs)]
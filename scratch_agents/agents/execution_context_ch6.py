@@ -7,6 +7,7 @@ import uuid
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from ..types.events import Event
+from ..types.contents import ContentItem
 from ..sessions.base_cross_session_manager import BaseCrossSessionManager
 
 @dataclass
@@ -26,6 +27,10 @@ class ExecutionContext:
     def events(self) -> List[Event]:
         return self.session.events
     
+    @property
+    def contents(self) -> List[ContentItem]:
+        return self.session.contents
+    
     @property
     def state(self) -> Dict[str, Any]:
         return self.session.state
@@ -5,16 +5,36 @@ from ..models.llm_response import LlmResponse
 from ..types.contents import Message, ToolCall
 from ..types.events import Event
 from .execution_context_ch6 import ExecutionContext
+from .batch_runner import BatchRun
+from .background_tasks import BackgroundTaskRunner
 from ..tools.base_tool import BaseTool
 from ..types.contents import ToolResult
+from ..types.stream_events import TokenDelta, ToolCallEvent, ToolResultEvent, FinalResultEvent
 from typing import Type
 from pydantic import BaseModel
 from ..tools.decorator import tool
+from ..tools.tool_selector import ToolSelector
+import asyncio
 import inspect
+from dataclasses import dataclass
 from ..sessions.base_session_manager import BaseSessionManager
 from ..sessions.in_memory_session_manager import InMemorySessionManager
 from ..sessions.base_cross_session_manager import BaseCrossSessionManager
 
+@dataclass
+class PromptCacheStats:
+    """Provider prompt-cache usage across the agent's LLM calls"""
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    prefix_changes: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Share of input tokens served from the provider's prompt cache"""
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
 class ToolCallingAgent:
     def __init__(self, name: str, model: BaseLlm, 
                  tools: List[BaseTool] = [], 
@@ -27,7 +47,11 @@ class ToolCallingAgent:
                  after_tool_callbacks = None,
                  after_run_callbacks = None,
                  session_manager: BaseSessionManager = None,
-                 cross_session_manager: BaseCrossSessionManager = None):
+                 cross_session_manager: BaseCrossSessionManager = None,
+                 parallel_tool_calls: bool = False,
+                 tool_selector: Optional[ToolSelector] = None,
+                 prefix_stable: bool = False,
+                 background_runner: Optional[BackgroundTaskRunner] = None):
         self.name = name
         self.model = model
         self.max_steps = max_steps
@@ -42,6 +66,15 @@ class ToolCallingAgent:
         self.after_run_callbacks = after_run_callbacks or []
         self.session_manager = session_manager or InMemorySessionManager()  
         self.cross_session_manager = cross_session_manager
+        self.parallel_tool_calls = parallel_tool_calls
+        self.tool_selector = tool_selector
+        # Place dynamic instructions after the history so the prompt prefix
+        # stays cacheable by the provider
+        self.prefix_stable = prefix_stable
+        self.prompt_cache_stats = PromptCacheStats()
+        # When set, after_run callbacks run on this runner after run() returns
+        self.background_runner = background_runner
+        self._tool_table = None
         
     def _setup_tools(self, tools: List[BaseTool]):
         if self.output_type is not None:
@@ -53,22 +86,67 @@ class ToolCallingAgent:
         return {t.name: t for t in tools}
         
     async def think(self, context: ExecutionContext, llm_request: LlmRequest):
+        if (result := await self._run_before_llm_callbacks(context, llm_request)) is not None:
+            return result
+        
+        self._record_prompt_prefix(context, llm_request)
+        llm_response = await self.model.generate(llm_request)
+        self._record_prompt_cache(context, llm_response)
+        
+        return await self._run_after_llm_callbacks(context, llm_response)
+    
+    async def think_stream(self, context: ExecutionContext, llm_request: LlmRequest):
+        """Like think, but yields TokenDelta items before the final LlmResponse"""
+        if (result := await self._run_before_llm_callbacks(context, llm_request)) is not None:
+            yield result
+            return
+        
+        self._record_prompt_prefix(context, llm_request)
+        llm_response = None
+        async for item in self.model.generate_stream(llm_request):
+            if isinstance(item, TokenDelta):
+                yield item
+            else:
+                llm_response = item
+        self._record_prompt_cache(context, llm_response)
+        
+        yield await self._run_after_llm_callbacks(context, llm_response)
+    
+    def _record_prompt_prefix(self, context: ExecutionContext, llm_request: LlmRequest):
+        """Track whether the cacheable prompt prefix changed since the previous step"""
+        fingerprint = llm_request.prefix_fingerprint()
+        previous = context.state.get("prompt_cache", {}).get("prefix_fingerprint")
+        changed = previous is not None and previous != fingerprint
+        if changed:
+            self.prompt_cache_stats.prefix_changes += 1
+        context.state["prompt_cache"] = {"prefix_fingerprint": fingerprint, "prefix_changed": changed}
+    
+    def _record_prompt_cache(self, context: ExecutionContext, llm_response: LlmResponse):
+        usage = llm_response.usage_metadata or {}
+        input_tokens = usage.get("input_tokens") or 0
+        cached_tokens = usage.get("cached_tokens") or 0
+        stats = self.prompt_cache_stats
+        stats.requests += 1
+        stats.input_tokens += input_tokens
+        stats.cached_tokens += cached_tokens
+        context.state["prompt_cache"].update(input_tokens=input_tokens, cached_tokens=cached_tokens)
+    
+    async def _run_before_llm_callbacks(self, context: ExecutionContext, llm_request: LlmRequest):
         for callback in self.before_llm_callbacks:
             result = callback(context, llm_request)
             if inspect.isawaitable(result):
                 result = await result
             if result is not None:
                 return result
-        
-        llm_response = await self.model.generate(llm_request)
-        
+        return None
+    
+    async def _run_after_llm_callbacks(self, context: ExecutionContext, llm_response: LlmResponse):
         for callback in self.after_llm_callbacks:
             result = callback(context, llm_response)
             if inspect.isawaitable(result):
                 result = await result
             if result is not None:
                 return result 
-        
         return llm_response
 
     async def _execute_tool(self, context: ExecutionContext, tool_name: str, tool_input: dict) -> Any:
@@ -79,56 +157,121 @@ class ToolCallingAgent:
         return await tool.execute(context, **tool_input)
     
     async def act(self, context: ExecutionContext, tool_calls: List[ToolCall]):
-        tool_results = []
+        if not self.parallel_tool_calls:
+            tool_results = []
+            for tool_call in tool_calls:
+                tool_result = await self._run_tool_call(context, tool_call)
+                if tool_result is not None:
+                    tool_results.append(tool_result)
+            return tool_results
+        
+        # Run consecutive tool calls concurrently. A call to a sequential tool
+        # acts as a barrier: it waits for the running group and runs alone.
+        results: List[Optional[ToolResult]] = []
+        group: List[ToolCall] = []
         for tool_call in tool_calls:
-            tool_name = tool_call.name
-            tool_input = tool_call.arguments
-            print(f"  → Calling {tool_name} with {tool_input}")
+            if self._is_sequential(tool_call):
+                results.extend(await self._run_tool_group(context, group))
+                group = []
+                results.append(await self._run_tool_call(context, tool_call))
+            else:
+                group.append(tool_call)
+        results.extend(await self._run_tool_group(context, group))
+        
+        return [tool_result for tool_result in results if tool_result is not None]
+    
+    def _is_sequential(self, tool_call: ToolCall) -> bool:
+        tool = self.tools.get(tool_call.name)
+        return tool is not None and tool.sequential
+    
+    async def _run_tool_group(self, context: ExecutionContext, tool_calls: List[ToolCall]):
+        """Run a group of tool calls concurrently, keeping results in call order"""
+        if len(tool_calls) <= 1:
+            return [await self._run_tool_call(context, tool_call) for tool_call in tool_calls]
+        return await asyncio.gather(
+            *(self._run_tool_call(context, tool_call) for tool_call in tool_calls)
+        )
+    
+    async def _run_tool_call(self, context: ExecutionContext, tool_call: ToolCall) -> Optional[ToolResult]:
+        tool_name = tool_call.name
+        tool_input = tool_call.arguments
+        print(f"  → Calling {tool_name} with {tool_input}")
 
-            # Step 1: before_tool_callbacks - can skip tool execution
-            tool_response = None
-            for callback in self.before_tool_callbacks:
-                result = callback(context, tool_call)
+        # Step 1: before_tool_callbacks - can skip tool execution
+        tool_response = None
+        for callback in self.before_tool_callbacks:
+            result = callback(context, tool_call)
+            if inspect.isawaitable(result):
+                result = await result
+            if result is not None:
+                tool_response = result
+                break
+        
+        # Step 2: Execute tool if no callback provided result
+        status = "success"
+        if tool_response is None:
+            try:
+                tool = self.tools[tool_name]
+                async with tool.concurrency_slot():
+                    tool_response = await self._execute_tool(context, tool_name, tool_input)
+            except Exception as e:
+                tool_response = str(e)
+                status = "error"
+        
+            # Step 3: after_tool_callbacks - only after actual tool execution
+            for callback in self.after_tool_callbacks:
+                result = callback(context, tool_response)
                 if inspect.isawaitable(result):
                     result = await result
                 if result is not None:
                     tool_response = result
                     break
-            
-            # Step 2: Execute tool if no callback provided result
-            status = "success"
-            if tool_response is None:
-                try:
-                    tool_response = await self._execute_tool(context, tool_name, tool_input)
-                except Exception as e:
-                    tool_response = str(e)
-                    status = "error"
-            
-                # Step 3: after_tool_callbacks - only after actual tool execution
-                for callback in self.after_tool_callbacks:
-                    result = callback(context, tool_response)
-                    if inspect.isawaitable(result):
-                        result = await result
-                    if result is not None:
-                        tool_response = result
-                        break
-            
-            # Step 4: Wrap in ToolResult at the end
-            if tool_response is not None:
-                tool_result = ToolResult(
-                    tool_call_id=tool_call.tool_call_id,
-                    name=tool_call.name,
-                    status=status,
-                    content=str(tool_response),
-                )
-                tool_results.append(tool_result)
-
-        return tool_results
+        
+        # Step 4: Wrap in ToolResult at the end
+        if tool_response is None:
+            return None
+        return ToolResult(
+            tool_call_id=tool_call.tool_call_id,
+            name=tool_call.name,
+            status=status,
+            content=str(tool_response),
+        )
     
     async def step(self, context: ExecutionContext):
         print(f"[Step {context.current_step + 1}]")
         llm_request = await self._prepare_llm_request(context)
         llm_response = await self.think(context, llm_request)
+        response_event = self._record_response(context, llm_response)
+        
+        if tool_calls := response_event.get_tool_calls():
+            tool_results = await self.act(context, tool_calls)
+            self._record_tool_results(context, tool_results)
+            
+        context.increment_step()
+    
+    async def step_stream(self, context: ExecutionContext):
+        """Run one step, yielding token deltas, tool calls and tool results"""
+        print(f"[Step {context.current_step + 1}]")
+        llm_request = await self._prepare_llm_request(context)
+        llm_response = None
+        async for item in self.think_stream(context, llm_request):
+            if isinstance(item, TokenDelta):
+                yield item
+            else:
+                llm_response = item
+        response_event = self._record_response(context, llm_response)
+        
+        if tool_calls := response_event.get_tool_calls():
+            for tool_call in tool_calls:
+                yield ToolCallEvent(tool_call=tool_call)
+            tool_results = await self.act(context, tool_calls)
+            self._record_tool_results(context, tool_results)
+            for tool_result in tool_results:
+                yield ToolResultEvent(tool_result=tool_result)
+            
+        context.increment_step()
+    
+    def _record_response(self, context: ExecutionContext, llm_response: LlmResponse) -> Event:
         if llm_response.error_message:
             raise RuntimeError(f"LLM error: {llm_response.error_message}")
         response_event = Event(
@@ -138,22 +281,71 @@ class ToolCallingAgent:
             **llm_response.model_dump(),
         )
         context.add_event(response_event)
-        
-        if tool_calls := response_event.get_tool_calls():
-            tool_results = await self.act(context, tool_calls)
-            tool_results_event = Event(
-                execution_id=context.execution_id,
-                author=self.name,
-                required_output_tool=self.output_tool or None,
-                content=tool_results,
-            )
-            context.add_event(tool_results_event)
-            
-        context.increment_step()
+        return response_event
+    
+    def _record_tool_results(self, context: ExecutionContext, tool_results: List[ToolResult]) -> None:
+        tool_results_event = Event(
+            execution_id=context.execution_id,
+            author=self.name,
+            required_output_tool=self.output_tool or None,
+            content=tool_results,
+        )
+        context.add_event(tool_results_event)
         
     async def run(self, user_input: str, 
                   user_id: str = None,
                   session_id: str = None):
+        context = await self.execute(user_input, user_id, session_id)
+        return context.final_result
+    
+    async def execute(self, user_input: str, 
+                      user_id: str = None,
+                      session_id: str = None) -> ExecutionContext:
+        """Run the agent and return the whole execution context"""
+        context = self._start_execution(user_input, user_id, session_id)
+        
+        while not context.final_result and context.current_step < self.max_steps:
+            await self.step(context)
+            self._update_final_result(context)
+                
+        await self._run_after_run_callbacks(context)
+            
+        return context
+    
+    async def run_stream(self, user_input: str, 
+                         user_id: str = None,
+                         session_id: str = None):
+        """Run the agent, yielding TokenDelta, ToolCallEvent, ToolResultEvent
+        items as they happen and a FinalResultEvent at the end"""
+        context = self._start_execution(user_input, user_id, session_id)
+        
+        while not context.final_result and context.current_step < self.max_steps:
+            async for event in self.step_stream(context):
+                yield event
+            self._update_final_result(context)
+        
+        await self._run_after_run_callbacks(context)
+        
+        yield FinalResultEvent(output=context.final_result)
+    
+    def run_batch(self, inputs, 
+                  concurrency: int = 8,
+                  checkpoint_path: str = None,
+                  user_id: str = "batch") -> BatchRun:
+        """Run the agent over many inputs, each in its own session
+        
+        Iterate the returned BatchRun to receive results as they complete;
+        its report holds throughput, error and token totals afterwards.
+        """
+        return BatchRun(
+            self,
+            inputs,
+            concurrency=concurrency,
+            checkpoint_path=checkpoint_path,
+            user_id=user_id,
+        )
+    
+    def _start_execution(self, user_input: str, user_id: str, session_id: str) -> ExecutionContext:
         session = self.session_manager.get_or_create_session(session_id, user_id)
         context = ExecutionContext(
             user_input=user_input,
@@ -173,34 +365,64 @@ class ToolCallingAgent:
             ],
         )
         context.add_event(user_input_event)
-        
-        while not context.final_result and context.current_step < self.max_steps:
-            await self.step(context)
-            
-            last_event = context.events[-1]
-            if last_event.is_final_response():
-                context.final_result = self._extract_final_result(last_event)
-                
-        for callback in self.after_run_callbacks:
+
+        # Let strategies start slow lookups (e.g. memory search) now, so they
+        # overlap with preparing the first request
+        for callback in self.before_llm_callbacks:
+            if prefetch := getattr(callback, "prefetch", None):
+                prefetch(context)
+        return context
+    
+    def _update_final_result(self, context: ExecutionContext) -> None:
+        last_event = context.events[-1]
+        if last_event.is_final_response():
+            context.final_result = self._extract_final_result(last_event)
+    
+    async def _run_after_run_callbacks(self, context: ExecutionContext) -> None:
+        callbacks = list(self.after_run_callbacks)
+        if not callbacks:
+            return
+        if self.background_runner is not None:
+            await self.background_runner.submit(
+                lambda: self._call_after_run_callbacks(context, callbacks),
+                name=f"after_run callbacks of execution {context.execution_id}",
+            )
+        else:
+            await self._call_after_run_callbacks(context, callbacks)
+    
+    async def _call_after_run_callbacks(self, context: ExecutionContext, callbacks) -> None:
+        for callback in callbacks:
             result = callback(context)
             if inspect.isawaitable(result):
                 await result
-            
-        return context.final_result
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background after-run work to finish, e.g. before shutdown"""
+        if self.background_runner is None:
+            return True
+        return await self.background_runner.drain(timeout)
             
     async def _prepare_llm_request(self, context: ExecutionContext):
-        flat_contents = []
-        for event in context.events:
-            flat_contents.extend(event.content)
-            
-        llm_request = LlmRequest(
+        tools_dict, request_processors = self._get_tool_table()
+        
+        # model_construct skips re-validating every content item of the history;
+        # the items were validated when their events were created.
+        llm_request = LlmRequest.model_construct(
             instructions=[self.instructions] if self.instructions else [],
-            contents=flat_contents,
-            tools_dict={tool.name:tool for tool in self.tools.values() if tool.tool_definition},
+            contents=list(context.contents),
+            dynamic_instructions=[],
+            tools_dict=dict(tools_dict),
+            tool_choice=None,
+            prefix_stable=self.prefix_stable,
         )
         
-        for tool in self.tools.values():
+        for tool in request_processors:
             await tool.process_llm_request(llm_request, context)
+        
+        if self.tool_selector and llm_request.tools_dict:
+            llm_request.tools_dict, context.state["tool_selection"] = await self.tool_selector.select(
+                llm_request.tools_dict, llm_request.contents
+            )
             
         if self.output_tool:
             llm_request.tool_choice = "required"
@@ -211,6 +433,19 @@ class ToolCallingAgent:
             
         return llm_request
     
+    def _get_tool_table(self):
+        """Return the cached tool definitions, rebuilt only when the tool set changes"""
+        tools = tuple(self.tools.values())
+        if self._tool_table is None or self._tool_table[0] != tools:
+            tools_dict = {tool.name: tool for tool in tools if tool.tool_definition}
+            # Only tools that override process_llm_request need to see the request
+            request_processors = [
+                tool for tool in tools
+                if type(tool).process_llm_request is not BaseTool.process_llm_request
+            ]
+            self._tool_table = (tools, tools_dict, request_processors)
+        return self._tool_table[1], self._tool_table[2]
+    
     def _extract_final_result(self, event: Event):
         if event.required_output_tool:
             for item in event.content:
@@ -10,4 +10,11 @@ class MemoryStrategy(ABC):
     
     async def __call__(self, context, llm_request):  #B
         """Make strategy callable as a before_llm_callback"""
-        return await self.apply(context, llm_request)
\ No newline at end of file
+        return await self.apply(context, llm_request)
+    
+    def prefetch(self, context):
+        """Start slow work for an execution before its first step (optional)
+        
+        Called by the agent when a run starts; must not block.
+        """
+        pass
\ No newline at end of file
@@ -16,6 +16,6 @@ class CoreMemoryStrategy(MemoryStrategy):
         
         if memory_parts:  
             memory_text = "\n\n".join(memory_parts)
-            llm_request.add_instructions([memory_text])  
+            llm_request.add_instructions([memory_text], dynamic=True)  
             
         return None  
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .base_memory_strategy import MemoryStrategy
+from .token_budget_strategy import TokenCounter
+from ..models.llm_request import LlmRequest
+from ..agents.execution_context_ch6 import ExecutionContext
+
+logger = logging.getLogger(__name__)
+
+MEMORY_BLOCK_HEADER = "[Relevant memories from earlier sessions]"
+
+
+@dataclass
+class RetrievalStats:
+    """Counters of a CrossSessionRetrievalStrategy"""
+    lookups: int = 0
+    cache_hits: int = 0
+    prefetches: int = 0
+    searches: int = 0
+    failures: int = 0
+    total_wait_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def mean_wait_ms(self) -> float:
+        """Mean time a step waited for memories"""
+        return self.total_wait_seconds / self.lookups * 1e3 if self.lookups else 0.0
+
+
+class CrossSessionRetrievalStrategy(MemoryStrategy):
+    """Add the cross-session memories relevant to the user input
+
+    The search starts in prefetch(), which the agent calls when a run
+    starts, so it overlaps with building the first request. Results are
+    cached per session and reused by every later step; they are searched
+    again when the user input changes or when the manager writes memories
+    of the user (see BaseCrossSessionManager.memory_version). The best
+    results are injected as a dynamic instruction of at most max_tokens.
+
+    Example:
+        agent = ToolCallingAgent(
+            ...,
+            cross_session_manager=manager,
+            before_llm_callbacks=[CrossSessionRetrievalStrategy(top_k=5)],
+        )
+
+    Args:
+        manager: Cross-session manager to search; defaults to the one of the context
+        top_k: Number of memories to retrieve
+        max_tokens: Token cap of the injected block
+        cache_size: Number of sessions whose results are kept
+        counter: TokenCounter used for the cap
+    """
+
+    def __init__(
+        self,
+        manager=None,
+        top_k: int = 5,
+        max_tokens: int = 500,
+        cache_size: int = 1_000,
+        counter: TokenCounter = None,
+    ):
+        self.manager = manager
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self.counter = counter or TokenCounter()
+        self.stats = RetrievalStats()
+        # session_id -> (cache key, task resolving to (memories, block))
+        self._cache = OrderedDict()
+
+    def prefetch(self, context: ExecutionContext):
+        """Start the search for the run's user input without waiting for it"""
+        if self._lookup(context) is not None:
+            self.stats.prefetches += 1
+
+    async def apply(self, context: ExecutionContext, llm_request: LlmRequest):
+        """Inject the cached memory block, waiting for the search on the first step"""
+        start = time.perf_counter()
+        task = self._lookup(context)
+        if task is None:
+            return None
+        self.stats.lookups += 1
+        cache_hit = task.done()
+        if cache_hit:
+            self.stats.cache_hits += 1
+        try:
+            # A cancelled step must not cancel the search shared with later steps
+            memories, block = await asyncio.shield(task)
+        except Exception as e:
+            logger.error(f"Error retrieving cross-session memories: {e}")
+            self._cache.pop(context.session.session_id, None)
+            self.stats.failures += 1
+            memories, block = [], ""
+        wait_seconds = time.perf_counter() - start
+        self.stats.total_wait_seconds += wait_seconds
+
+        if block:
+            llm_request.add_instructions([block], dynamic=True)
+        context.state["cross_session_memory"] = {
+            "memories": len(memories),
+            "block_tokens": self.counter.count_text(block),
+            "cache_hit": cache_hit,
+            "wait_ms": wait_seconds * 1e3,
+        }
+        return None
+
+    def _lookup(self, context: ExecutionContext):
+        """Return the search task for the context, starting one when the cache is stale"""
+        manager = self.manager or context.cross_session_manager
+        user_id = context.session.user_id
+        if manager is None or not user_id or not context.user_input:
+            return None
+
+        session_id = context.session.session_id
+        key = (id(manager), user_id, context.user_input, manager.memory_version(user_id))
+        entry = self._cache.get(session_id)
+        if entry is not None and entry[0] == key:
+            self._cache.move_to_end(session_id)
+            return entry[1]
+
+        task = asyncio.create_task(self._search(manager, context.user_input, user_id))
+        self._cache[session_id] = (key, task)
+        self._cache.move_to_end(session_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self.stats.searches += 1
+        return task
+
+    async def _search(self, manager, query: str, user_id: str):
+        memories = await manager.search(query, user_id, limit=self.top_k)
+        return memories, self._format(memories)
+
+    def _format(self, memories) -> str:
+        """Memory block of the closest memories that fit max_tokens"""
+        lines = []
+        tokens = self.counter.count_text(MEMORY_BLOCK_HEADER)
+        for memory in sorted(memories, key=lambda memory: memory.get("distance", 0)):
+            line = f"- {memory['content']}"
+            line_tokens = self.counter.count_text(line)
+            if tokens + line_tokens > self.max_tokens:
+                break
+            lines.append(line)
+            tokens += line_tokens
+        if not lines:
+            return ""
+        return "\n".join([MEMORY_BLOCK_HEADER] + lines)
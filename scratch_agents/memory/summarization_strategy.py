@@ -1,5 +1,6 @@
 from .base_memory_strategy import MemoryStrategy
 from ..models.llm_request import LlmRequest
+from ..models.rate_limiter import llm_priority, BACKGROUND
 from ..types.contents import Message
 
 class SummarizationStrategy(MemoryStrategy):
@@ -20,7 +21,8 @@ class SummarizationStrategy(MemoryStrategy):
             contents=[Message(role="user", content=messages_text)]  #B
         )
         
-        response = await self.model.generate(request)  #C
+        with llm_priority(BACKGROUND):  # yield to interactive agent steps
+            response = await self.model.generate(request)  #C
         
         for item in response.content:  #D
             if isinstance(item, Message) and item.role == "assistant":  #D
@@ -67,7 +69,7 @@ class SummarizationStrategy(MemoryStrategy):
         
         if new_summary:
             summary_instruction = f"[Previous Conversation Summary]\n{new_summary}"
-            llm_request.add_instructions([summary_instruction])  #F
+            llm_request.add_instructions([summary_instruction], dynamic=True)  #F
         
         llm_request.contents = to_keep  #G
         
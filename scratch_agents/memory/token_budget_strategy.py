@@ -0,0 +1,145 @@
+import json
+from collections import OrderedDict
+
+from .base_memory_strategy import MemoryStrategy
+from ..models.llm_request import LlmRequest
+from ..models.rate_limiter import estimate_tokens
+from ..agents.execution_context_ch6 import ExecutionContext
+from ..types.contents import Message, ToolCall, ToolResult
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Chat formatting adds a few tokens around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenCounter:
+    """Count tokens locally, caching the count of every content item
+
+    Uses tiktoken when it is installed and falls back to the four
+    characters per token estimate otherwise. Content items are immutable
+    once recorded in an event, so their counts are cached by identity.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini", cache_size: int = 10_000):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+    def count_item(self, item) -> int:
+        """Tokens of one content item, including message overhead"""
+        key = id(item)
+        entry = self._cache.get(key)
+        # The stored reference guards against a reused id of a freed item
+        if entry is not None and entry[0] is item:
+            self._cache.move_to_end(key)
+            return entry[1]
+
+        if isinstance(item, ToolCall):
+            count = self.count_text(item.name) + self.count_text(json.dumps(item.arguments))
+        else:
+            count = self.count_text(item.content)
+        count += MESSAGE_OVERHEAD_TOKENS
+
+        self._cache[key] = (item, count)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return count
+
+    def count_tool(self, tool) -> int:
+        """Tokens of a tool definition, cached like content items"""
+        key = id(tool)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] is tool:
+            return entry[1]
+        count = self.count_text(json.dumps(tool.tool_definition))
+        self._cache[key] = (tool, count)
+        return count
+
+
+class TokenBudgetStrategy(MemoryStrategy):
+    """Trim the oldest history so the request fits a token budget
+
+    Instructions and tool definitions are always kept. History is dropped
+    oldest-first in whole turns, so a ToolCall is never separated from its
+    ToolResult, and the latest turn is always kept.
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 128_000,
+        reserve_output_tokens: int = 4_096,
+        model: str = "gpt-4o-mini",
+        counter: TokenCounter = None,
+    ):
+        self.max_context_tokens = max_context_tokens
+        self.reserve_output_tokens = reserve_output_tokens
+        self.counter = counter or TokenCounter(model)
+
+    async def apply(self, context: ExecutionContext, llm_request: LlmRequest):
+        """Drop the oldest turns until the request fits the budget"""
+        counter = self.counter
+        budget = self.max_context_tokens - self.reserve_output_tokens
+        instructions = llm_request.instructions + llm_request.dynamic_instructions
+        fixed_tokens = sum(counter.count_text(instruction) + MESSAGE_OVERHEAD_TOKENS for instruction in instructions)
+        fixed_tokens += sum(counter.count_tool(tool) for tool in llm_request.tools_dict.values())
+
+        groups = self._group_turns(llm_request.contents)
+        group_tokens = [sum(counter.count_item(item) for item in group) for group in groups]
+        tokens_before = fixed_tokens + sum(group_tokens)
+
+        history_tokens = tokens_before - fixed_tokens
+        first_kept = 0
+        while history_tokens + fixed_tokens > budget and first_kept < len(groups) - 1:
+            history_tokens -= group_tokens[first_kept]
+            first_kept += 1
+
+        if first_kept:
+            llm_request.contents = [item for group in groups[first_kept:] for item in group]
+
+        context.state["token_budget"] = {
+            "budget": budget,
+            "tokens_before": tokens_before,
+            "tokens_after": fixed_tokens + history_tokens,
+            "dropped_items": sum(len(group) for group in groups[:first_kept]),
+        }
+        return None
+
+    @staticmethod
+    def _group_turns(contents):
+        """Split history into groups that must be kept or dropped together
+
+        A model turn (assistant text and/or tool calls) is grouped with the
+        tool results that answer it.
+        """
+        groups = []
+        for item in contents:
+            if groups and (
+                isinstance(item, ToolResult)
+                or (isinstance(item, ToolCall) and _ends_with_model_output(groups[-1]))
+            ):
+                groups[-1].append(item)
+            else:
+                groups.append([item])
+        return groups
+
+
+def _ends_with_model_output(group) -> bool:
+    last = group[-1]
+    return isinstance(last, ToolCall) or (isinstance(last, Message) and last.role == "assistant")
@@ -1,6 +1,8 @@
 from abc import abstractmethod
 from pydantic import BaseModel
 from .llm_request import LlmRequest
+from ..types.contents import Message
+from ..types.stream_events import TokenDelta
 
 class BaseLlm(BaseModel):
     """Abstract base class for LLM implementations"""
@@ -9,4 +11,16 @@ class BaseLlm(BaseModel):
     
     @abstractmethod
     async def generate(self, request: LlmRequest):
-        pass
\ No newline at end of file
+        pass
+    
+    async def generate_stream(self, request: LlmRequest):
+        """Stream a response as TokenDelta items followed by the complete LlmResponse
+        
+        The default implementation does not stream: it yields the whole text
+        as one delta. Adapters override this with real streaming.
+        """
+        response = await self.generate(request)
+        for item in response.content:
+            if isinstance(item, Message) and item.role == "assistant" and item.content:
+                yield TokenDelta(text=item.content)
+        yield response
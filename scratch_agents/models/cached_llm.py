@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from .llm_wrapper import LlmWrapper
+from ..types.contents import Message
+from ..types.stream_events import TokenDelta
+
+
+def request_cache_key(request: LlmRequest, model: str, llm_config: Dict[str, Any]) -> str:
+    """Canonical hash of everything that determines an LLM response
+
+    Covers the model, sampling configuration, instructions, contents,
+    tool choice and tool definitions. Tool definitions are sorted so the
+    order of tools_dict does not matter.
+    """
+    tools = sorted(
+        json.dumps(tool.tool_definition, sort_keys=True)
+        for tool in request.tools_dict.values()
+    )
+    payload = {
+        "model": model,
+        "llm_config": llm_config,
+        "request": request.model_dump(mode="json", exclude={"tools_dict"}),
+        "tools": tools,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(llm_config: Dict[str, Any]) -> bool:
+    """Whether the sampling settings ask for a reproducible response
+
+    Only explicit settings count: a positive temperature or more than one
+    choice makes the request non-deterministic.
+    """
+    temperature = llm_config.get("temperature")
+    if temperature is not None and temperature > 0:
+        return False
+    return llm_config.get("n", 1) <= 1
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of a response cache"""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SqliteResponseCache:
+    """On-disk response store with a time-to-live, shared between processes"""
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[LlmResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return LlmResponse.model_validate_json(response)
+
+    def set(self, key: str, response: LlmResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response.model_dump_json(), time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLlm(LlmWrapper):
+    """LLM wrapper that serves identical requests from a cache
+
+    Responses are kept in an in-memory LRU and, when disk_path is given, in
+    a SQLite file so they survive restarts. Requests with non-deterministic
+    sampling settings bypass the cache unless cache_nondeterministic is set.
+    Error responses are never cached.
+
+    Example:
+        model = CachedLlm(OpenAILlm("gpt-4o-mini", temperature=0), disk_path="llm_cache.db")
+    """
+
+    max_entries: int = 1024
+    ttl_seconds: Optional[float] = None
+    cache_nondeterministic: bool = False
+
+    def __init__(
+        self,
+        llm,
+        max_entries: int = 1024,
+        disk_path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        cache_nondeterministic: bool = False,
+    ):
+        super().__init__(
+            llm,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            cache_nondeterministic=cache_nondeterministic,
+        )
+        self._stats = CacheStats()
+        self._memory = OrderedDict()
+        self._disk = SqliteResponseCache(disk_path, ttl_seconds) if disk_path else None
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._stats
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        key = self._cache_key(request)
+        if key is None:
+            return await self._llm.generate(request)
+
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+
+        response = await self._llm.generate(request)
+        await self._store(key, response)
+        return response
+
+    async def generate_stream(self, request: LlmRequest):
+        key = self._cache_key(request)
+        cached = await self._lookup(key) if key is not None else None
+        if cached is not None:
+            for item in cached.content:
+                if isinstance(item, Message) and item.role == "assistant" and item.content:
+                    yield TokenDelta(text=item.content)
+            yield cached
+            return
+
+        async for item in self._llm.generate_stream(request):
+            if isinstance(item, LlmResponse) and key is not None:
+                await self._store(key, item)
+            yield item
+
+    def _cache_key(self, request: LlmRequest) -> Optional[str]:
+        """Cache key for the request, or None when the request bypasses the cache"""
+        llm_config = self.llm_config
+        if not self.cache_nondeterministic and not is_deterministic(llm_config):
+            self.stats.bypassed += 1
+            return None
+        return request_cache_key(request, self.model, llm_config)
+
+    async def _lookup(self, key: str) -> Optional[LlmResponse]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, created_at = entry
+            if self.ttl_seconds is None or time.time() - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats.hits += 1
+                return response.model_copy(deep=True)
+            del self._memory[key]
+
+        if self._disk is not None:
+            response = await asyncio.to_thread(self._disk.get, key)
+            if response is not None:
+                self._remember(key, response.model_copy(deep=True))
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return response
+
+        self.stats.misses += 1
+        return None
+
+    async def _store(self, key: str, response: LlmResponse) -> None:
+        if response.error_message:
+            return
+        self._remember(key, response.model_copy(deep=True))
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, response)
+        self.stats.stores += 1
+
+    def _remember(self, key: str, response: LlmResponse) -> None:
+        self._memory[key] = (response, time.time())
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all in-memory entries"""
+        self._memory.clear()
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class EmbeddingStats:
+    """Counters of an EmbeddingService"""
+    requested: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    coalesced: int = 0
+    api_calls: int = 0
+    api_texts: int = 0
+
+
+# Stores opened on the same path share a lock so their appends never interleave
+_store_locks: Dict[str, threading.Lock] = {}
+_store_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _store_locks_guard:
+        return _store_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class EmbeddingStore:
+    """Append-only on-disk store of float32 vectors keyed by string
+
+    Vectors are appended to `<path>.f32`; `<path>.idx` holds one
+    "key offset dim" line per vector and is loaded into memory on start.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = _lock_for(path)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._index_path):
+            with open(self._index_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 3:
+                        self._index[parts[0]] = (int(parts[1]), int(parts[2]))
+
+    @property
+    def _index_path(self) -> str:
+        return self.path + ".idx"
+
+    @property
+    def _vectors_path(self) -> str:
+        return self.path + ".f32"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            entries = [(key, self._index[key]) for key in keys if key in self._index]
+            if not entries:
+                return found
+            with open(self._vectors_path, "rb") as f:
+                for key, (offset, dim) in entries:
+                    f.seek(offset)
+                    vector = array("f")
+                    vector.frombytes(f.read(dim * 4))
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: List[Tuple[str, List[float]]]) -> None:
+        with self._lock:
+            items = [(key, vector) for key, vector in items if key not in self._index]
+            if not items:
+                return
+            with open(self._vectors_path, "ab") as vectors, open(self._index_path, "a", encoding="utf-8") as index:
+                offset = vectors.tell()
+                for key, vector in items:
+                    data = array("f", vector).tobytes()
+                    vectors.write(data)
+                    index.write(f"{key} {offset} {len(vector)}\n")
+                    self._index[key] = (offset, len(vector))
+                    offset += len(data)
+
+
+class EmbeddingService:
+    """Embed texts with batching, request coalescing and a persistent cache
+
+    Concurrent embed() calls are gathered for batch_window seconds (or until
+    max_batch_size texts are waiting) and sent as one API call. Vectors are
+    cached by (model, text hash) in memory and, when cache_path is set, in
+    an EmbeddingStore, so each text is embedded at most once.
+
+    Example:
+        embedder = EmbeddingService(OpenAILlm("gpt-4o-mini"), cache_path="./cache/embeddings")
+        vectors = await embedder.embed(["first text", "second text"])
+    """
+
+    def __init__(
+        self,
+        llm,
+        model: str = "text-embedding-3-small",
+        batch_window: float = 0.005,
+        max_batch_size: int = 256,
+        cache_path: Optional[str] = None,
+        max_memory_entries: int = 10_000,
+    ):
+        self.llm = llm
+        self.model = model
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_memory_entries = max_memory_entries
+        self.stats = EmbeddingStats()
+        self._memory: OrderedDict = OrderedDict()
+        self._store = EmbeddingStore(cache_path) if cache_path else None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._batch: List[Tuple[str, str]] = []
+        self._flush_handle = None
+        # Running _flush tasks; the loop only keeps weak references to tasks
+        self._flush_tasks: set = set()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, returning one vector per text in the same order"""
+        keys = [self._key(text) for text in texts]
+        self.stats.requested += len(texts)
+        vectors: Dict[str, List[float]] = {}
+
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                vectors[key] = self._memory[key]
+        self.stats.memory_hits += len(vectors)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing and self._store is not None:
+            on_disk = [key for key in missing if key in self._store]
+            if on_disk:
+                found = await asyncio.to_thread(self._store.get_many, on_disk)
+                self.stats.disk_hits += len(found)
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                vectors.update(found)
+
+        futures = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in futures:
+                continue
+            if key in self._pending:
+                self.stats.coalesced += 1
+                futures[key] = self._pending[key]
+            else:
+                futures[key] = self._enqueue(key, text)
+        if futures:
+            # The futures are shared with coalesced callers: shield them so
+            # that cancelling this caller does not cancel the others
+            results = await asyncio.gather(*(asyncio.shield(future) for future in futures.values()))
+            vectors.update(zip(futures.keys(), results))
+
+        return [vectors[key] for key in keys]
+
+    async def embed_one(self, text: str) -> List[float]:
+        return (await self.embed([text]))[0]
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _enqueue(self, key: str, text: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = future
+        self._batch.append((key, text))
+        if len(self._batch) >= self.max_batch_size:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._start_flush)
+        return future
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, str]]) -> None:
+        self.stats.api_calls += 1
+        self.stats.api_texts += len(batch)
+        try:
+            result = await self.llm.embed(self.model, [text for _, text in batch])
+            if isinstance(result, dict):
+                # OpenAILlm.embed reports failures as {"error": ...}
+                raise RuntimeError(f"Embedding failed: {result.get('error')}")
+            if len(result) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} embeddings, got {len(result)}")
+        except Exception as e:
+            for key, _ in batch:
+                future = self._pending.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        items = list(zip([key for key, _ in batch], result))
+        for key, vector in items:
+            self._remember(key, vector)
+            future = self._pending.pop(key)
+            if not future.done():
+                future.set_result(vector)
+        if self._store is not None:
+            await asyncio.to_thread(self._store.put_many, items)
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
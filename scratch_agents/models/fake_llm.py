@@ -0,0 +1,383 @@
+import asyncio
+import hashlib
+import math
+import random
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from .base_llm import BaseLlm
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from .rate_limiter import estimate_request_tokens, estimate_tokens
+from ..types.contents import Message, ToolCall, ToolResult
+from ..types.stream_events import TokenDelta
+
+# A scripted reply: a response, plain assistant text, or a function of the request
+ScriptedReply = Union[LlmResponse, str, Callable[[LlmRequest], LlmResponse]]
+
+
+def text_response(text: str) -> LlmResponse:
+    """A response holding one assistant message"""
+    return LlmResponse(content=[Message(role="assistant", content=text)])
+
+
+def tool_call_response(name: str, arguments: Optional[Dict[str, Any]] = None, tool_call_id: Optional[str] = None) -> LlmResponse:
+    """A response that calls one tool"""
+    return LlmResponse(content=[ToolCall(
+        tool_call_id=tool_call_id or f"call_{uuid.uuid4().hex[:12]}",
+        name=name,
+        arguments=arguments or {},
+    )])
+
+
+def final_answer_response(output: Union[BaseModel, Dict[str, Any]]) -> LlmResponse:
+    """A response that calls the agent's final_answer tool with a structured output"""
+    if isinstance(output, BaseModel):
+        output = output.model_dump(mode="json")
+    return tool_call_response("final_answer", {"output": output})
+
+
+def sample_from_json_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None, name: str = "value") -> Any:
+    """Build a deterministic value that validates against a JSON schema
+
+    Supports the subset pydantic emits: $ref/$defs, anyOf/oneOf/allOf,
+    enum, const, objects, arrays and scalar types. Defaults and examples
+    are used when the schema provides them.
+    """
+    root = root or schema
+    if "$ref" in schema:
+        target = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        return sample_from_json_schema(target, root, name)
+    if "const" in schema:
+        return schema["const"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("examples"):
+        return schema["examples"][0]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            # Prefer a non-null branch so optional fields get a value
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return sample_from_json_schema(options[0], root, name)
+    if "allOf" in schema:
+        merged = {}
+        for part in schema["allOf"]:
+            resolved = sample_from_json_schema(part, root, name)
+            if isinstance(resolved, dict):
+                merged.update(resolved)
+        return merged
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object" or (schema_type is None and "properties" in schema):
+        return {
+            key: sample_from_json_schema(value, root, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = max(1, schema.get("minItems", 1))
+        if "maxItems" in schema:
+            count = min(count, schema["maxItems"])
+        return [sample_from_json_schema(schema.get("items", {}), root, name) for _ in range(count)]
+    if schema_type == "string":
+        value = f"sample {name}"
+        if "minLength" in schema and len(value) < schema["minLength"]:
+            value = value.ljust(schema["minLength"], "x")
+        if "maxLength" in schema:
+            value = value[:schema["maxLength"]]
+        return value
+    if schema_type in ("integer", "number"):
+        if "minimum" in schema:
+            value = schema["minimum"]
+        elif "exclusiveMinimum" in schema:
+            value = schema["exclusiveMinimum"] + 1
+        else:
+            value = 0
+        return int(value) if schema_type == "integer" else float(value)
+    if schema_type == "boolean":
+        return False
+    if schema_type == "null":
+        return None
+    return f"sample {name}"
+
+
+def hashed_embedding(text: str, dim: int = 64) -> List[float]:
+    """Deterministic unit vector from hashed word features
+
+    Texts that share words get similar vectors, so similarity thresholds
+    behave roughly as they do with real embeddings.
+    """
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return [x / norm for x in vector]
+
+
+class LatencyModel:
+    """Seeded latency distribution for fake calls
+
+    Use one of the constructors:
+        LatencyModel.fixed(0.2)
+        LatencyModel.lognormal(median=0.8, sigma=0.5)
+        LatencyModel.recorded([0.41, 0.52, 1.9, ...])
+
+    per_output_token adds a decode cost for every generated token.
+    """
+
+    def __init__(self, sampler: Callable[[random.Random], float], per_output_token: float = 0.0, seed: int = 0):
+        self._sampler = sampler
+        self.per_output_token = per_output_token
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def fixed(cls, seconds: float, per_output_token: float = 0.0) -> "LatencyModel":
+        return cls(lambda rng: seconds, per_output_token)
+
+    @classmethod
+    def lognormal(cls, median: float, sigma: float = 0.5, per_output_token: float = 0.0, seed: int = 0) -> "LatencyModel":
+        return cls(lambda rng: rng.lognormvariate(math.log(median), sigma), per_output_token, seed)
+
+    @classmethod
+    def recorded(cls, samples: List[float], per_output_token: float = 0.0, seed: int = 0) -> "LatencyModel":
+        if not samples:
+            raise ValueError("recorded latency needs at least one sample")
+        samples = list(samples)
+        return cls(lambda rng: rng.choice(samples), per_output_token, seed)
+
+    def sample(self, output_tokens: int = 0) -> float:
+        return max(0.0, self._sampler(self._rng)) + self.per_output_token * output_tokens
+
+
+@dataclass
+class ScriptRule:
+    """A scripted reply chosen by pattern, by agent step, or both
+
+    Attributes:
+        reply: The response to return
+        pattern: Regex searched in the text of the last content item
+        step: Agent step (number of earlier model turns in the request)
+        times: How often the rule may fire; None means unlimited
+    """
+    reply: ScriptedReply
+    pattern: Optional[str] = None
+    step: Optional[int] = None
+    times: Optional[int] = None
+
+    def matches(self, step: int, text: str) -> bool:
+        if self.times is not None and self.times <= 0:
+            return False
+        if self.step is not None and self.step != step:
+            return False
+        if self.pattern is not None and not re.search(self.pattern, text):
+            return False
+        return True
+
+
+@dataclass
+class FakeLlmStats:
+    """Call counters of a FakeLlm"""
+    generate_calls: int = 0
+    structured_calls: int = 0
+    embed_calls: int = 0
+    embedded_texts: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    simulated_latency: float = 0.0
+
+
+class FakeLlm(BaseLlm):
+    """Scripted, deterministic LLM for offline benchmarks and tests
+
+    generate() picks its reply from the first matching rule, then from the
+    replies list by agent step, then falls back to default_reply. The agent
+    step is the number of model turns already in the request, so concurrent
+    conversations are scripted independently. Usage metadata is synthesised
+    from token estimates when a reply has none.
+
+    generate_structured() returns the configured value for the response
+    format (keyed by class or class name), or one sampled from its JSON
+    schema. embed() returns hashed bag-of-words unit vectors.
+
+    Example:
+        model = FakeLlm(
+            replies=[tool_call_response("search_web", {"query": "weather"}), "It is sunny."],
+            latency=LatencyModel.lognormal(median=0.6),
+        )
+    """
+
+    model: str = "fake-llm"
+    embedding_dim: int = 64
+    fail_rate: float = 0.0
+
+    def __init__(
+        self,
+        replies: Optional[List[ScriptedReply]] = None,
+        rules: Optional[List[ScriptRule]] = None,
+        default_reply: ScriptedReply = "OK",
+        structured: Optional[Dict[Union[type, str], Any]] = None,
+        latency: Optional[LatencyModel] = None,
+        embedding_dim: int = 64,
+        fail_rate: float = 0.0,
+        seed: int = 0,
+        model: str = "fake-llm",
+    ):
+        super().__init__(model=model, embedding_dim=embedding_dim, fail_rate=fail_rate)
+        self._replies = list(replies or [])
+        self._rules = list(rules or [])
+        self._default_reply = default_reply
+        self._structured = {
+            key if isinstance(key, str) else key.__name__: value
+            for key, value in (structured or {}).items()
+        }
+        self._latency = latency
+        self._rng = random.Random(seed)
+        self._stats = FakeLlmStats()
+
+    @property
+    def stats(self) -> FakeLlmStats:
+        return self._stats
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        self._stats.generate_calls += 1
+        response = self._respond(request)
+        await self._sleep(response.usage_metadata.get("output_tokens", 0))
+        return response
+
+    async def generate_stream(self, request: LlmRequest):
+        """Yield the reply word by word, spreading the sampled latency over the words"""
+        self._stats.generate_calls += 1
+        response = self._respond(request)
+        text = "".join(
+            item.content for item in response.content
+            if isinstance(item, Message) and item.role == "assistant"
+        )
+        words = re.findall(r"\S+\s*", text)
+        delay = self._sample_latency(response.usage_metadata.get("output_tokens", 0))
+        if not words:
+            await asyncio.sleep(delay)
+        for word in words:
+            await asyncio.sleep(delay / len(words))
+            yield TokenDelta(text=word)
+        yield response
+
+    async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
+        self._stats.structured_calls += 1
+        value = self._structured.get(response_format.__name__)
+        if callable(value) and not isinstance(value, BaseModel):
+            value = value(messages)
+        if value is None:
+            value = sample_from_json_schema(response_format.model_json_schema())
+        if isinstance(value, dict):
+            value = response_format.model_validate(value)
+        output_tokens = estimate_tokens(value.model_dump_json()) if isinstance(value, BaseModel) else 0
+        self._stats.input_tokens += sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+        self._stats.output_tokens += output_tokens
+        await self._sleep(output_tokens)
+        if self._should_fail():
+            return {"error": "Injected failure"}
+        return value
+
+    async def embed(self, model, texts: List[str]) -> List[List[float]]:
+        self._stats.embed_calls += 1
+        self._stats.embedded_texts += len(texts)
+        self._stats.input_tokens += sum(estimate_tokens(text) for text in texts)
+        await self._sleep(0)
+        if self._should_fail():
+            return {"error": "Injected failure"}
+        return [hashed_embedding(text, self.embedding_dim) for text in texts]
+
+    def _respond(self, request: LlmRequest) -> LlmResponse:
+        if self._should_fail():
+            return LlmResponse(error_message="Injected failure")
+        step = self._step(request)
+        response = self._to_response(self._select(request, step), request)
+        if not response.usage_metadata:
+            input_tokens = estimate_request_tokens(request)
+            output_tokens = sum(
+                estimate_tokens(item.content) if isinstance(item, Message)
+                else estimate_tokens(item.name + str(item.arguments))
+                for item in response.content
+            )
+            response.usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        self._stats.input_tokens += response.usage_metadata.get("input_tokens", 0)
+        self._stats.output_tokens += response.usage_metadata.get("output_tokens", 0)
+        return response
+
+    def _select(self, request: LlmRequest, step: int) -> ScriptedReply:
+        text = self._last_text(request)
+        for rule in self._rules:
+            if rule.matches(step, text):
+                if rule.times is not None:
+                    rule.times -= 1
+                return rule.reply
+        if step < len(self._replies):
+            return self._replies[step]
+        return self._default_reply
+
+    @staticmethod
+    def _to_response(reply: ScriptedReply, request: LlmRequest) -> LlmResponse:
+        if isinstance(reply, str):
+            return text_response(reply)
+        if isinstance(reply, LlmResponse):
+            # Fresh tool call ids keep concurrent conversations apart
+            response = reply.model_copy(deep=True)
+            for item in response.content:
+                if isinstance(item, ToolCall):
+                    item.tool_call_id = f"call_{uuid.uuid4().hex[:12]}"
+            return response
+        return reply(request)
+
+    @staticmethod
+    def _step(request: LlmRequest) -> int:
+        """Number of model turns already in the request"""
+        step = 0
+        in_turn = False
+        for item in request.contents:
+            produced_by_model = isinstance(item, ToolCall) or (isinstance(item, Message) and item.role == "assistant")
+            if produced_by_model and not in_turn:
+                step += 1
+            in_turn = produced_by_model
+        return step
+
+    @staticmethod
+    def _last_text(request: LlmRequest) -> str:
+        if not request.contents:
+            return ""
+        item = request.contents[-1]
+        if isinstance(item, (Message, ToolResult)):
+            return item.content
+        return f"{item.name} {item.arguments}"
+
+    def _should_fail(self) -> bool:
+        return self.fail_rate > 0 and self._rng.random() < self.fail_rate
+
+    def _sample_latency(self, output_tokens: int) -> float:
+        if self._latency is None:
+            return 0.0
+        delay = self._latency.sample(output_tokens)
+        self._stats.simulated_latency += delay
+        return delay
+
+    async def _sleep(self, output_tokens: int) -> None:
+        delay = self._sample_latency(output_tokens)
+        # Always yield to the loop so fakes interleave like real network calls
+        await asyncio.sleep(delay)
@@ -0,0 +1,386 @@
+"""Local OpenAI-compatible server for end-to-end load tests
+
+Serves /v1/chat/completions (plain, streamed, with tool calls and with
+json_schema response formats as used by `chat.completions.parse`) and
+/v1/embeddings, with configurable latency and injected errors. Point
+OpenAILlm or LlmClient at it to exercise the real network path:
+
+    async with FakeOpenAIServer(latency=LatencyModel.lognormal(0.5)) as server:
+        model = OpenAILlm("gpt-4o-mini", base_url=server.base_url, api_key="fake")
+
+or run it standalone:
+
+    python -m scratch_agents.models.fake_openai_server --port 8089 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from .fake_llm import LatencyModel, hashed_embedding, sample_from_json_schema
+from .rate_limiter import estimate_tokens
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+@dataclass
+class ServerStats:
+    """Request counters of a FakeOpenAIServer"""
+    requests: int = 0
+    connections: int = 0
+    streamed: int = 0
+    injected_errors: int = 0
+    injected_rate_limits: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    requests_by_path: Dict[str, int] = field(default_factory=dict)
+
+
+class FakeOpenAIServer:
+    """Minimal HTTP/1.1 server speaking the OpenAI chat and embeddings API
+
+    Replies are deterministic: when the request offers tools and the last
+    message is not a tool result, the first tool is called with arguments
+    sampled from its schema; after a tool result, a final_answer tool is
+    called if offered, otherwise `reply` is returned as text.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind; 0 picks a free one
+        reply: Assistant text for plain replies
+        latency: Latency of each completion; streamed replies spread it over the tokens
+        error_rate: Fraction of requests answered with HTTP 500
+        rate_limit_rate: Fraction of requests answered with HTTP 429
+        retry_after: Retry-After seconds sent with injected 429s
+        embedding_dim: Size of returned embeddings
+        seed: Seed for error injection
+        cache_min_tokens: Shortest prompt prefix reported as cached; like
+            provider prompt caches, a prefix counts as cached when an earlier
+            request started with the same tools and messages
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        reply: str = "This is a reply from the fake OpenAI server.",
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        embedding_dim: int = 64,
+        seed: int = 0,
+        cache_min_tokens: int = 1024,
+    ):
+        self.host = host
+        self.port = port
+        self.reply = reply
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.embedding_dim = embedding_dim
+        self.stats = ServerStats()
+        self.cache_min_tokens = cache_min_tokens
+        self._rng = random.Random(seed)
+        self._prefix_cache = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> "FakeOpenAIServer":
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise outlive the server
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def __aenter__(self) -> "FakeOpenAIServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # HTTP handling
+    # ------------------------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats.connections += 1
+        self._connections[writer] = asyncio.current_task()
+        try:
+            # Keep-alive: serve requests until the client closes the connection
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                await self._dispatch(writer, method, path, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        return method, path.split("?", 1)[0], headers, body
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes) -> None:
+        self.stats.requests += 1
+        self.stats.requests_by_path[path] = self.stats.requests_by_path.get(path, 0) + 1
+
+        if method != "POST" or path not in ("/v1/chat/completions", "/v1/embeddings"):
+            await self._send_json(writer, 404, _error_body(f"No route for {method} {path}", "not_found"))
+            return
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            await self._send_json(writer, 400, _error_body("Body is not valid JSON", "invalid_request_error"))
+            return
+
+        if self.rate_limit_rate and self._rng.random() < self.rate_limit_rate:
+            self.stats.injected_rate_limits += 1
+            await self._send_json(
+                writer, 429, _error_body("Rate limit reached (injected)", "rate_limit_exceeded"),
+                {"retry-after": str(self.retry_after)},
+            )
+            return
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats.injected_errors += 1
+            await self._send_json(writer, 500, _error_body("Internal error (injected)", "server_error"))
+            return
+
+        if path == "/v1/embeddings":
+            await self._send_json(writer, 200, self._embeddings(payload))
+        elif payload.get("stream"):
+            self.stats.streamed += 1
+            await self._stream_completion(writer, payload)
+        else:
+            message, usage = self._completion_message(payload)
+            await asyncio.sleep(self._latency(usage["completion_tokens"]))
+            await self._send_json(writer, 200, {
+                **self._completion_envelope(payload, "chat.completion"),
+                "choices": [{"index": 0, "message": message, "finish_reason": _finish_reason(message), "logprobs": None}],
+                "usage": usage,
+            })
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "content-type: application/json", f"content-length: {len(data)}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def _stream_completion(self, writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
+        message, usage = self._completion_message(payload)
+        writer.write(b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ntransfer-encoding: chunked\r\n\r\n")
+        envelope = self._completion_envelope(payload, "chat.completion.chunk")
+
+        deltas = [{"role": "assistant", "content": ""}]
+        if message["content"]:
+            deltas += [{"content": piece} for piece in re.findall(r"\S+\s*", message["content"])]
+        for index, call in enumerate(message.get("tool_calls") or []):
+            arguments = call["function"]["arguments"]
+            middle = len(arguments) // 2
+            # Split the arguments like real providers do
+            deltas.append({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                           "function": {"name": call["function"]["name"], "arguments": arguments[:middle]}}]})
+            deltas.append({"tool_calls": [{"index": index, "function": {"arguments": arguments[middle:]}}]})
+
+        delay = self._latency(usage["completion_tokens"]) / len(deltas)
+        for position, delta in enumerate(deltas):
+            await asyncio.sleep(delay)
+            finish_reason = _finish_reason(message) if position == len(deltas) - 1 else None
+            await self._send_event(writer, {**envelope, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]})
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await self._send_event(writer, {**envelope, "choices": [], "usage": usage})
+        await self._send_chunk(writer, b"data: [DONE]\n\n")
+        await self._send_chunk(writer, b"")
+
+    async def _send_event(self, writer: asyncio.StreamWriter, event: Dict[str, Any]) -> None:
+        await self._send_chunk(writer, f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+
+    @staticmethod
+    async def _send_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    # ------------------------------------------------------------------
+    # Response bodies
+    # ------------------------------------------------------------------
+
+    def _completion_message(self, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        messages = payload.get("messages") or []
+        tools = [tool.get("function", {}) for tool in payload.get("tools") or []]
+        # Trailing system messages (dynamic instructions) do not end a turn
+        roles = [m.get("role") for m in messages if m.get("role") != "system"]
+        last_role = roles[-1] if roles else None
+        response_format = payload.get("response_format") or {}
+
+        message = {"role": "assistant", "content": None, "refusal": None}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"].get("schema", {})
+            message["content"] = json.dumps(sample_from_json_schema(schema))
+        elif tools and last_role != "tool":
+            message["tool_calls"] = [_tool_call(tools[0])]
+        elif tools and last_role == "tool" and (final := next((t for t in tools if t.get("name") == "final_answer"), None)):
+            message["tool_calls"] = [_tool_call(final)]
+        else:
+            message["content"] = self.reply
+
+        prompt_tokens, cached_tokens = self._prompt_cache_usage(tools, messages)
+        completion_tokens = estimate_tokens(message["content"] or json.dumps(message.get("tool_calls")))
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.cached_tokens += cached_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        return message, usage
+
+    def _prompt_cache_usage(self, tools, messages) -> Tuple[int, int]:
+        """Prompt tokens, and how many of them an exact-prefix cache would serve"""
+        digest = hashlib.sha256(json.dumps(tools, sort_keys=True).encode("utf-8"))
+        tokens = sum(estimate_tokens(json.dumps(tool)) for tool in tools)
+        cached = 0
+        for m in messages:
+            digest.update(json.dumps(m, sort_keys=True).encode("utf-8"))
+            tokens += estimate_tokens(json.dumps(m.get("content") or ""))
+            key = digest.hexdigest()
+            if key in self._prefix_cache:
+                self._prefix_cache.move_to_end(key)
+                cached = tokens
+            else:
+                self._prefix_cache[key] = None
+        while len(self._prefix_cache) > 100_000:
+            self._prefix_cache.popitem(last=False)
+        return tokens, cached if cached >= self.cache_min_tokens else 0
+
+    @staticmethod
+    def _completion_envelope(payload: Dict[str, Any], obj: str) -> Dict[str, Any]:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": obj,
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "system_fingerprint": "fake",
+        }
+
+    def _embeddings(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        texts = payload.get("input") or []
+        if isinstance(texts, str):
+            texts = [texts]
+        tokens = sum(estimate_tokens(str(text)) for text in texts)
+        return {
+            "object": "list",
+            "model": payload.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": hashed_embedding(str(text), self.embedding_dim)}
+                for i, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _latency(self, output_tokens: int) -> float:
+        return self.latency.sample(output_tokens) if self.latency is not None else 0.0
+
+
+def _tool_call(function: Dict[str, Any]) -> Dict[str, Any]:
+    arguments = sample_from_json_schema(function.get("parameters") or {"type": "object"})
+    return {
+        "id": f"call_{uuid.uuid4().hex[:24]}",
+        "type": "function",
+        "function": {"name": function.get("name", "tool"), "arguments": json.dumps(arguments)},
+    }
+
+
+def _finish_reason(message: Dict[str, Any]) -> str:
+    return "tool_calls" if message.get("tool_calls") else "stop"
+
+
+def _error_body(message: str, code: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": code, "param": None, "code": code}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="Median completion latency in seconds")
+    parser.add_argument("--sigma", type=float, default=0.0, help="Lognormal spread of the latency; 0 keeps it fixed")
+    parser.add_argument("--per-token", type=float, default=0.0, help="Extra seconds per output token")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    latency = None
+    if args.latency > 0 and args.sigma > 0:
+        latency = LatencyModel.lognormal(args.latency, args.sigma, per_output_token=args.per_token)
+    elif args.latency > 0 or args.per_token > 0:
+        latency = LatencyModel.fixed(args.latency, per_output_token=args.per_token)
+
+    server = FakeOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+    )
+
+    async def run() -> None:
+        await server.start()
+        print(f"Fake OpenAI server listening on {server.base_url}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import asyncio
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool settings shared by every client in the process"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    http2: bool = True
+
+
+@dataclass
+class PoolStats:
+    """Request counters of the shared pool"""
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    errors: int = 0
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when it has been fully consumed or closed"""
+
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that counts requests in flight until their body is closed"""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: PoolStats):
+        self._transport = transport
+        self._stats = stats
+
+    @property
+    def connection_pool(self):
+        """The httpcore pool behind the transport, or None
+
+        httpx exposes no public accessor; this reads AsyncHTTPTransport._pool
+        as of the pinned httpx 0.28.1 and falls back to None if it moves.
+        """
+        return getattr(self._transport, "_pool", None)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.requests += 1
+        self._stats.in_flight += 1
+        self._stats.max_in_flight = max(self._stats.max_in_flight, self._stats.in_flight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            self._stats.errors += 1
+            self._release()
+            raise
+        response.stream = _TrackedStream(response.stream, self._release)
+        return response
+
+    def _release(self) -> None:
+        self._stats.in_flight -= 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ClientRegistry:
+    """Process-wide pooled HTTP clients for LLM adapters, embeddings and tools
+
+    httpx clients are bound to the event loop they first run on, so the
+    registry keeps one pooled client per running loop. OpenAI clients are
+    cached per (loop, base_url, api_key) and all share that loop's pool.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig()
+        self.stats = PoolStats()
+        self._http_clients = weakref.WeakKeyDictionary()
+        self._transports = weakref.WeakKeyDictionary()
+        self._openai_clients = weakref.WeakKeyDictionary()
+
+    def http_client(self) -> httpx.AsyncClient:
+        """The pooled httpx client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None or client.is_closed:
+            transport = self._create_transport()
+            client = self._create_http_client(transport)
+            self._http_clients[loop] = client
+            self._transports[loop] = transport
+        return client
+
+    def openai_client(self, base_url: Optional[str] = None, api_key: Optional[str] = None) -> AsyncOpenAI:
+        """An AsyncOpenAI client on the shared pool
+
+        Retries are left to the adapters' retry policy, so the SDK's own
+        retries are disabled.
+        """
+        loop = asyncio.get_running_loop()
+        clients = self._openai_clients.setdefault(loop, {})
+        key = (base_url, api_key)
+        client = clients.get(key)
+        if client is None or client.is_closed():
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=self.http_client(),
+                max_retries=0,
+            )
+            clients[key] = client
+        return client
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Request counters plus open and idle connections across pools"""
+        open_connections = 0
+        idle_connections = 0
+        for transport in list(self._transports.values()):
+            for connection in getattr(transport.connection_pool, "connections", []):
+                open_connections += 1
+                if connection.is_idle():
+                    idle_connections += 1
+        return {
+            **asdict(self.stats),
+            "open_connections": open_connections,
+            "idle_connections": idle_connections,
+            "max_connections": self.config.max_connections,
+            "utilisation": open_connections / self.config.max_connections,
+            "http2": self.config.http2 and HTTP2_AVAILABLE,
+        }
+
+    async def aclose(self) -> None:
+        """Close the pool of the running loop"""
+        loop = asyncio.get_running_loop()
+        self._openai_clients.pop(loop, None)
+        self._transports.pop(loop, None)
+        client = self._http_clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def _create_transport(self) -> InstrumentedTransport:
+        config = self.config
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits,
+            http2=config.http2 and HTTP2_AVAILABLE,
+        )
+        return InstrumentedTransport(transport, self.stats)
+
+    def _create_http_client(self, transport: InstrumentedTransport) -> httpx.AsyncClient:
+        config = self.config
+        timeout = httpx.Timeout(
+            connect=config.connect_timeout,
+            read=config.read_timeout,
+            write=config.write_timeout,
+            pool=config.pool_timeout,
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            follow_redirects=True,
+        )
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """The process-wide client registry"""
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry()
+    return _registry
+
+
+def configure_client_pool(config: PoolConfig) -> ClientRegistry:
+    """Replace the process-wide registry; call before any client is created"""
+    global _registry
+    _registry = ClientRegistry(config)
+    return _registry
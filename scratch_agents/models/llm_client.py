@@ -1,53 +1,120 @@
 import json
 from typing import List, Optional
 
+import litellm
 from litellm import acompletion
 
+from scratch_agents.models.http_pool import get_client_registry
 from scratch_agents.models.llm_request import LlmRequest
 from scratch_agents.models.llm_response import LlmResponse
+from scratch_agents.models.retry import RetryPolicy, RetryingCaller, RetryStats
+from scratch_agents.models.streaming import StreamAssembler
 from scratch_agents.types.contents import Message, ToolCall, ToolResult
+from scratch_agents.types.stream_events import TokenDelta
 
 
 class LlmClient:
     """Client for LLM API calls using LiteLLM."""
 
-    def __init__(self, model: str, **config):
+    def __init__(
+        self,
+        model: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        base_url: Optional[str] = None,
+        **config,
+    ):
+        """
+        Args:
+            model: LiteLLM model name, e.g. "openai/gpt-4o-mini"
+            retry_policy: How API calls are retried and hedged
+            base_url: OpenAI-compatible endpoint (LiteLLM's api_base), e.g.
+                a local FakeOpenAIServer
+            **config: Extra arguments for acompletion
+        """
         self.model = model
+        if base_url is not None:
+            config.setdefault("api_base", base_url)
         self.config = config
+        self._retry = RetryingCaller(retry_policy)
+
+    @property
+    def retry_stats(self) -> RetryStats:
+        return self._retry.stats
 
     async def generate(self, request: LlmRequest) -> LlmResponse:
         """Generate a response from the LLM."""
         try:
-            messages = self._build_messages(request)
-            tools = (
-                [tool.tool_definition for tool in request.tools]
-                if request.tools
-                else None
-            )
-
-            response = await acompletion(
-                model=self.model,
-                messages=messages,
-                tools=tools,
-                **({"tool_choice": request.tool_choice} if request.tool_choice else {}),
-                **self.config,
-            )
+            call_kwargs = self._build_call_kwargs(request)
+            response = await self._retry.call(lambda: acompletion(**call_kwargs))
 
             return self._parse_response(response)
 
         except Exception as e:
             return LlmResponse(error_message=str(e))
 
+    async def generate_stream(self, request: LlmRequest):
+        """Stream a response: TokenDelta items, then the complete LlmResponse."""
+        try:
+            call_kwargs = self._build_call_kwargs(request)
+            # Only opening the stream is retried
+            stream = await self._retry.call(
+                lambda: acompletion(
+                    **call_kwargs,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+            )
+            assembler = StreamAssembler()
+            async for chunk in stream:
+                text = assembler.add_chunk(chunk)
+                if text:
+                    yield TokenDelta(text=text)
+            yield assembler.build_response(self._usage_metadata(assembler.usage))
+
+        except Exception as e:
+            yield LlmResponse(error_message=str(e))
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _build_call_kwargs(self, request: LlmRequest) -> dict:
+        """Build the keyword arguments for acompletion."""
+        # Route LiteLLM's async HTTP traffic through the shared pool; the
+        # global is only written when the loop's pool is (re)created
+        http_client = get_client_registry().http_client()
+        if litellm.aclient_session is not http_client:
+            litellm.aclient_session = http_client
+        tools = (
+            [tool.tool_definition for tool in request.tools_dict.values()]
+            if request.tools_dict
+            else None
+        )
+        return {
+            "model": self.model,
+            "messages": self._build_messages(request),
+            "tools": tools,
+            **({"tool_choice": request.tool_choice} if request.tool_choice else {}),
+            **self.config,
+        }
+
+    def _usage_metadata(self, usage) -> dict:
+        """Extract token usage from a LiteLLM usage object."""
+        if usage is None:
+            return {}
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        }
+
     def _build_messages(self, request: LlmRequest) -> List[dict]:
         """Convert LlmRequest to OpenAI/LiteLLM message format."""
         messages: List[dict] = []
 
         # System instructions
-        for instruction in request.instructions:
+        for instruction in request.leading_instructions():
             messages.append({
                 "role": "system",
                 "content": instruction,
@@ -90,6 +157,13 @@ class LlmClient:
                     ),
                 })
 
+        # Dynamic instructions of prefix-stable requests follow the history
+        for instruction in request.trailing_instructions():
+            messages.append({
+                "role": "system",
+                "content": instruction,
+            })
+
         return messages
 
     def _parse_response(self, response) -> LlmResponse:
@@ -119,8 +193,5 @@ class LlmClient:
 
         return LlmResponse(
             content=content_items,
-            usage_metadata={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-            },
+            usage_metadata=self._usage_metadata(response.usage),
         )
\ No newline at end of file
@@ -1,19 +1,61 @@
+import hashlib
+import json
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 from ..types.contents import ContentItem
 
 
 class LlmRequest(BaseModel):
-    """Request object for LLM calls"""
+    """Request object for LLM calls
+    
+    Static instructions (agent instructions) and dynamic instructions
+    (memory blocks, summaries and other text that changes between steps)
+    are kept apart. With prefix_stable set, adapters send dynamic
+    instructions after the conversation history, so static instructions,
+    tool definitions and the append-only history form a prefix that the
+    provider's prompt cache can reuse.
+    """
     instructions: List[str] = Field(default_factory=list)
+    dynamic_instructions: List[str] = Field(default_factory=list)
     contents: List[ContentItem] = Field(default_factory=list)
     tools_dict: Dict[str, Any] = Field(default_factory=dict)
     tool_choice: Optional[str] = None
+    prefix_stable: bool = False
 
-    def add_instructions(self, instructions: List[str] | str):
-        """Add instructions to the request"""
+    def add_instructions(self, instructions: List[str] | str, dynamic: bool = False):
+        """Add instructions to the request
+        
+        Args:
+            instructions: One instruction or a list of them
+            dynamic: Whether the text changes between steps of a run
+        """
+        target = self.dynamic_instructions if dynamic else self.instructions
         if isinstance(instructions, str):
-            self.instructions.append(instructions)
+            target.append(instructions)
         else:
-            self.instructions.extend(instructions)
-        
\ No newline at end of file
+            target.extend(instructions)
+
+    def leading_instructions(self) -> List[str]:
+        """Instructions sent before the conversation history"""
+        if self.prefix_stable:
+            return self.instructions
+        return self.instructions + self.dynamic_instructions
+
+    def trailing_instructions(self) -> List[str]:
+        """Instructions sent after the conversation history"""
+        return self.dynamic_instructions if self.prefix_stable else []
+
+    def prefix_fingerprint(self) -> str:
+        """Hash of the part of the prompt that precedes the history
+        
+        When it stays the same between steps, the provider can serve the
+        prefix (and the history after it) from its prompt cache.
+        """
+        digest = hashlib.sha256()
+        for instruction in self.leading_instructions():
+            digest.update(instruction.encode("utf-8"))
+            digest.update(b"\0")
+        for tool in self.tools_dict.values():
+            digest.update(json.dumps(tool.tool_definition, sort_keys=True).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
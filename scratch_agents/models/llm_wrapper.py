@@ -0,0 +1,43 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel
+from .base_llm import BaseLlm
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+
+
+class LlmWrapper(BaseLlm):
+    """Base class for LLMs that add behaviour around another LLM
+    
+    The wrapped LLM can be any adapter with a `generate` method, such as
+    OpenAILlm or LlmClient. Calls that a subclass does not override are
+    forwarded unchanged.
+    """
+    
+    def __init__(self, llm, **kwargs):
+        super().__init__(model=llm.model, **kwargs)
+        self._llm = llm
+    
+    @property
+    def llm(self):
+        return self._llm
+    
+    @property
+    def llm_config(self) -> Dict[str, Any]:
+        """Sampling configuration of the wrapped LLM"""
+        config = getattr(self._llm, "llm_config", None)
+        if config is None:
+            config = getattr(self._llm, "config", None)
+        return config or {}
+    
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        return await self._llm.generate(request)
+    
+    async def generate_stream(self, request: LlmRequest):
+        async for item in self._llm.generate_stream(request):
+            yield item
+    
+    async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
+        return await self._llm.generate_structured(messages, response_format)
+    
+    async def embed(self, model, texts: List[str]) -> List[List[float]]:
+        return await self._llm.embed(model, texts)
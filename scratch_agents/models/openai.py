@@ -1,48 +1,63 @@
-from openai import AsyncOpenAI
 from .base_llm import BaseLlm
+from .http_pool import get_client_registry
 from .llm_request import LlmRequest
 from .llm_response import LlmResponse
+from .retry import RetryPolicy, RetryingCaller, RetryStats
+from .streaming import StreamAssembler
 from ..types.contents import Message, ToolCall, ToolResult
+from ..types.stream_events import TokenDelta
 import json
 from pydantic import Field, BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 class OpenAILlm(BaseLlm):
     """OpenAI LLM implementation"""
     
     llm_config: dict = Field(default_factory=dict)
+    base_url: Optional[str] = None
     
-    def __init__(self, model, **kwargs):
-        super().__init__(model=model)
+    def __init__(
+        self,
+        model,
+        retry_policy: Optional[RetryPolicy] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            model: Model name
+            retry_policy: How API calls are retried and hedged
+            base_url: OpenAI-compatible endpoint, e.g. a local FakeOpenAIServer;
+                defaults to OPENAI_BASE_URL or the OpenAI API
+            api_key: API key; defaults to OPENAI_API_KEY
+            **kwargs: Sampling parameters sent with every request
+        """
+        super().__init__(model=model, base_url=base_url)
         self.llm_config = kwargs
+        self._api_key = api_key
         self._client = None
+        self._retry = RetryingCaller(retry_policy)
     
     @property
     def openai_client(self):
-        if self._client is None:
-            self._client = AsyncOpenAI()
-        return self._client
+        if self._client is not None:
+            return self._client
+        # Shared, pooled client of the running event loop; its SDK
+        # retries are off because the retry policy handles them
+        return get_client_registry().openai_client(base_url=self.base_url, api_key=self._api_key)
+    
+    @property
+    def retry_stats(self) -> RetryStats:
+        return self._retry.stats
     
     async def generate(self, request: LlmRequest) -> LlmResponse:
         """Generate a response using OpenAI API"""
         try:
-            # Build messages for OpenAI API
-            messages, model_params = self._build_llm_input(request, self.llm_config)
-            
-            # Convert tools_dict to tools array for OpenAI
-            tools = None
-            if request.tools_dict:
-                tools = [tool.tool_definition for tool in request.tools_dict.values()]
             # Call OpenAI API
-            call_kwargs = {}
-            if request.tool_choice is not None:
-                call_kwargs["tool_choice"] = request.tool_choice
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=tools,
-                **call_kwargs,
-                **model_params
+            call_kwargs = self._build_call_kwargs(request)
+            response = await self._retry.call(
+                lambda: self.openai_client.chat.completions.create(**call_kwargs)
             )
            
             # Extract message from response
@@ -62,28 +77,75 @@ class OpenAILlm(BaseLlm):
                        arguments=json.loads(tool_call.function.arguments)
                    ))
            
-            # Extract usage metadata
-            usage_metadata = {
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            }
-           
             return LlmResponse(
                 content=content_items,
-                usage_metadata=usage_metadata
+                usage_metadata=self._usage_metadata(response.usage)
             )
         except Exception as e:
             return LlmResponse(
                 error_message=str(e)
             )
     
+    async def generate_stream(self, request: LlmRequest):
+        """Stream a response, yielding TokenDelta items and then the complete LlmResponse"""
+        try:
+            call_kwargs = self._build_call_kwargs(request)
+            # Only opening the stream is retried; a stream that fails midway is reported
+            stream = await self._retry.call(
+                lambda: self.openai_client.chat.completions.create(
+                    **call_kwargs,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+            )
+            assembler = StreamAssembler()
+            async for chunk in stream:
+                text = assembler.add_chunk(chunk)
+                if text:
+                    yield TokenDelta(text=text)
+            yield assembler.build_response(self._usage_metadata(assembler.usage))
+        except Exception as e:
+            yield LlmResponse(error_message=str(e))
+    
+    def _build_call_kwargs(self, request: LlmRequest) -> Dict[str, Any]:
+        """Build the keyword arguments for chat.completions.create"""
+        # Build messages for OpenAI API
+        messages, model_params = self._build_llm_input(request, self.llm_config)
+        
+        # Convert tools_dict to tools array for OpenAI
+        tools = None
+        if request.tools_dict:
+            tools = [tool.tool_definition for tool in request.tools_dict.values()]
+        call_kwargs = {}
+        if request.tool_choice is not None:
+            call_kwargs["tool_choice"] = request.tool_choice
+        return {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            **call_kwargs,
+            **model_params,
+        }
+    
+    def _usage_metadata(self, usage) -> Dict[str, Any]:
+        """Extract usage metadata from a completion"""
+        if usage is None:
+            return {}
+        # Prompt tokens served from the provider's prompt cache
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", None) or 0
+        }
+    
     def _build_llm_input(self, request: LlmRequest, model_config: dict):
         """Build messages and parameters for OpenAI API"""
         messages = []
         
         # Add instructions as system messages
-        for instruction in request.instructions:
+        for instruction in request.leading_instructions():
             messages.append({"role": "system", "content": instruction})
         
         # Add conversation history
@@ -143,6 +205,10 @@ class OpenAILlm(BaseLlm):
         # Flush any remaining assistant message
         flush_assistant_message()
         
+        # Dynamic instructions of prefix-stable requests follow the history
+        for instruction in request.trailing_instructions():
+            messages.append({"role": "system", "content": instruction})
+        
         # Extract model parameters
         model_params = {**self.llm_config}
         
@@ -151,11 +217,13 @@ class OpenAILlm(BaseLlm):
     async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
         """Generate structured output using OpenAI's response_format"""
         try:
-            response = await self.openai_client.chat.completions.parse(
-                model=self.model,
-                messages=messages,
-                response_format=response_format,
-                **self.llm_config
+            response = await self._retry.call(
+                lambda: self.openai_client.chat.completions.parse(
+                    model=self.model,
+                    messages=messages,
+                    response_format=response_format,
+                    **self.llm_config
+                )
             )
             
             return response.choices[0].message.parsed
@@ -165,9 +233,11 @@ class OpenAILlm(BaseLlm):
     async def embed(self, model, texts: List[str]) -> List[List[float]]:
         """Get embeddings using OpenAI API"""
         try:
-            response = await self.openai_client.embeddings.create(
-                model=model,
-                input=texts
+            response = await self._retry.call(
+                lambda: self.openai_client.embeddings.create(
+                    model=model,
+                    input=texts
+                )
             )
             return [embedding.embedding for embedding in response.data]
         except Exception as e:
@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from .llm_wrapper import LlmWrapper
+
+# Lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Set the scheduling priority of LLM calls made inside the block
+
+    Example:
+        with llm_priority(BACKGROUND):
+            await model.generate(request)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token for English text"""
+    return len(text) // 4 + 1
+
+
+def estimate_request_tokens(request: LlmRequest) -> int:
+    """Estimate the input tokens of a request without a tokenizer"""
+    instructions = request.instructions + request.dynamic_instructions
+    total = sum(estimate_tokens(instruction) for instruction in instructions)
+    for item in request.contents:
+        if item.type == "tool_call":
+            total += estimate_tokens(item.name + json.dumps(item.arguments))
+        else:
+            total += estimate_tokens(item.content)
+    for tool in request.tools_dict.values():
+        total += estimate_tokens(json.dumps(tool.tool_definition))
+    return total
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken; requests above capacity wait for a full bucket"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take tokens; the balance may go negative to record usage above the estimate"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass
+class SchedulerStats:
+    """Wait-time counters of a rate-limited LLM, overall and per priority"""
+    dispatched: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    dispatched_by_priority: Dict[int, int] = field(default_factory=dict)
+    wait_seconds_by_priority: Dict[int, float] = field(default_factory=dict)
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.dispatched if self.dispatched else 0.0
+
+    def record(self, priority: int, wait: float) -> None:
+        self.dispatched += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.dispatched_by_priority[priority] = self.dispatched_by_priority.get(priority, 0) + 1
+        self.wait_seconds_by_priority[priority] = self.wait_seconds_by_priority.get(priority, 0.0) + wait
+
+
+class RateLimitedLlm(LlmWrapper):
+    """LLM wrapper that keeps outbound calls within RPM/TPM limits
+
+    Calls wait in a priority queue until both the request bucket and the
+    token bucket can cover them. Interactive calls are served before
+    background ones (see llm_priority). A call is charged its estimated
+    input tokens plus its output allowance; the token bucket is corrected
+    with the actual usage once the response arrives.
+
+    Example:
+        model = RateLimitedLlm(OpenAILlm("gpt-4o-mini"), requests_per_minute=500, tokens_per_minute=200_000)
+    """
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    default_output_tokens: int = 512
+
+    def __init__(
+        self,
+        llm,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        default_output_tokens: int = 512,
+    ):
+        super().__init__(
+            llm,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            default_output_tokens=default_output_tokens,
+        )
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._queue = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+        self._stats = SchedulerStats()
+
+    @property
+    def stats(self) -> SchedulerStats:
+        return self._stats
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for capacity"""
+        return sum(1 for entry in self._queue if not entry[3].done())
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        charged = estimate_request_tokens(request) + self._output_allowance()
+        await self._acquire(charged)
+        response = await self._llm.generate(request)
+        self._settle(charged, response.usage_metadata)
+        return response
+
+    async def generate_stream(self, request: LlmRequest):
+        charged = estimate_request_tokens(request) + self._output_allowance()
+        await self._acquire(charged)
+        async for item in self._llm.generate_stream(request):
+            if isinstance(item, LlmResponse):
+                self._settle(charged, item.usage_metadata)
+            yield item
+
+    async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
+        charged = sum(estimate_tokens(str(m.get("content", ""))) for m in messages) + self._output_allowance()
+        await self._acquire(charged)
+        return await self._llm.generate_structured(messages, response_format)
+
+    async def embed(self, model, texts: List[str]) -> List[List[float]]:
+        await self._acquire(sum(estimate_tokens(text) for text in texts))
+        return await self._llm.embed(model, texts)
+
+    def _output_allowance(self) -> int:
+        config = self.llm_config
+        return config.get("max_completion_tokens") or config.get("max_tokens") or self.default_output_tokens
+
+    def _settle(self, charged: int, usage_metadata: Dict[str, Any]) -> None:
+        """Correct the token bucket with the usage the provider reported"""
+        if self._tokens is None or not usage_metadata:
+            return
+        actual = (usage_metadata.get("input_tokens") or 0) + (usage_metadata.get("output_tokens") or 0)
+        if actual > charged:
+            self._tokens.consume(actual - charged)
+        elif actual < charged:
+            self._tokens.refund(charged - actual)
+
+    async def _acquire(self, tokens: int) -> None:
+        if self._requests is None and self._tokens is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        priority = _current_priority.get()
+        heapq.heappush(self._queue, (priority, next(self._sequence), tokens, future, time.monotonic()))
+        self._wakeup.set()
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """Grant queued calls in priority order as bucket capacity allows"""
+        try:
+            while self._queue:
+                priority, _, tokens, future, enqueued_at = self._queue[0]
+                if future.done():
+                    # The caller was cancelled while waiting
+                    heapq.heappop(self._queue)
+                    continue
+
+                wait = 0.0
+                if self._requests is not None:
+                    wait = max(wait, self._requests.wait_time(1))
+                if self._tokens is not None:
+                    wait = max(wait, self._tokens.wait_time(tokens))
+                if wait > 0:
+                    # Sleep until capacity refills, or until a new call arrives
+                    # that may have a higher priority than the current head
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(self._queue)
+                if self._requests is not None:
+                    self._requests.consume(1)
+                if self._tokens is not None:
+                    self._tokens.consume(tokens)
+                self._stats.record(priority, time.monotonic() - enqueued_at)
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
@@ -0,0 +1,183 @@
+import asyncio
+import inspect
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+# Request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class RetryPolicy:
+    """How an adapter retries and hedges provider calls
+
+    Attributes:
+        max_attempts: Total attempts per call, including the first one
+        base_delay: Backoff before the first retry, doubled on every retry
+        max_delay: Upper bound of a single backoff
+        jitter: Fraction of the backoff that is randomised (1.0 = full jitter)
+        respect_retry_after: Wait at least as long as a Retry-After header asks
+        hedge: Send a duplicate request when the first one is slow
+        hedge_after: Fixed hedging delay in seconds; when None the delay is
+            the hedge_percentile of recently observed latencies
+        hedge_percentile: Latency percentile used as the adaptive delay
+        min_latency_samples: Samples needed before adaptive hedging starts
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    jitter: float = 1.0
+    respect_retry_after: bool = True
+    hedge: bool = False
+    hedge_after: Optional[float] = None
+    hedge_percentile: float = 0.95
+    min_latency_samples: int = 20
+
+    def backoff(self, retry_number: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (retry_number - 1))
+        return delay * (1 - self.jitter * random.random())
+
+
+@dataclass
+class RetryStats:
+    """Counters of a RetryingCaller"""
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error from OpenAI or LiteLLM is worth retrying"""
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # openai.APIConnectionError / APITimeoutError and their LiteLLM
+    # counterparts carry no status code
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Delay requested by the provider through Retry-After headers, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if (value := headers.get("retry-after-ms")) is not None:
+            return float(value) / 1000
+        if (value := headers.get("retry-after")) is not None:
+            return float(value)
+    except (TypeError, ValueError):
+        # HTTP-date values are not worth parsing for provider rate limits
+        return None
+    return None
+
+
+class RetryingCaller:
+    """Run provider calls under a RetryPolicy, optionally hedging slow attempts"""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self.stats = RetryStats()
+        self._latencies = deque(maxlen=500)
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn(), retrying retryable errors with exponential backoff and jitter"""
+        self.stats.calls += 1
+        retry_number = 0
+        while True:
+            try:
+                return await self._attempt(fn)
+            except Exception as e:
+                retry_number += 1
+                if retry_number >= self.policy.max_attempts or not is_retryable(e):
+                    self.stats.failures += 1
+                    raise
+                delay = self.policy.backoff(retry_number)
+                if self.policy.respect_retry_after and (retry_after := retry_after_seconds(e)):
+                    delay = max(delay, retry_after)
+                self.stats.retries += 1
+                await asyncio.sleep(delay)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not yet calibrated"""
+        if not self.policy.hedge:
+            return None
+        if self.policy.hedge_after is not None:
+            return self.policy.hedge_after
+        if len(self._latencies) < self.policy.min_latency_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.policy.hedge_percentile))
+        return ordered[index]
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        self.stats.attempts += 1
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is None:
+            result = await fn()
+        else:
+            result = await self._hedged(fn, hedge_delay)
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], hedge_delay: float) -> Any:
+        primary = asyncio.create_task(fn())
+        pending = {primary}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if primary in done:
+                return primary.result()
+
+            self.stats.hedges += 1
+            self.stats.attempts += 1
+            hedge = asyncio.create_task(fn())
+            pending.add(hedge)
+            # First successful answer wins; the loser is cancelled or released below
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                    else:
+                        # Both attempts finished together; close the extra stream or response
+                        await _release(task.result())
+                if winner is not None:
+                    if winner is hedge:
+                        self.stats.hedge_wins += 1
+                    return winner.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            # A loser can finish before its cancellation lands
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if not isinstance(result, BaseException):
+                    await _release(result)
+
+
+async def _release(result: Any) -> None:
+    """Close a result nobody will read, such as an open stream or HTTP response"""
+    close = getattr(result, "aclose", None) or getattr(result, "close", None)
+    if not callable(close):
+        return
+    try:
+        closed = close()
+        if inspect.isawaitable(closed):
+            await closed
+    except Exception:
+        pass
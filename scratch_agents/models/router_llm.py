@@ -0,0 +1,200 @@
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from .base_llm import BaseLlm
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from ..types.stream_events import TokenDelta
+
+
+@dataclass
+class BackendStats:
+    """Health and latency statistics of one router backend"""
+    name: str
+    weight: float = 1.0
+    ewma_latency: Optional[float] = None
+    ewma_error_rate: float = 0.0
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+
+class RouterLlm(BaseLlm):
+    """Route requests across several OpenAI-compatible backends
+
+    Each backend is an adapter such as OpenAILlm or LlmClient. Requests go
+    to the best healthy backend according to the policy and fail over to
+    the next one on errors:
+
+    - "latency": lowest EWMA latency, penalised by the EWMA error rate;
+      backends without measurements are tried first
+    - "weighted": random choice in proportion to the backend weights
+    - "least_outstanding": fewest requests currently in flight
+
+    A backend that fails failure_threshold times in a row is skipped for
+    cooldown_seconds.
+
+    Example:
+        model = RouterLlm([OpenAILlm("gpt-4o-mini"), LlmClient("azure/gpt-4o-mini")])
+    """
+
+    policy: Literal["latency", "weighted", "least_outstanding"] = "latency"
+    alpha: float = 0.2
+    failure_threshold: int = 3
+    cooldown_seconds: float = 30.0
+
+    def __init__(
+        self,
+        backends: List[Any],
+        policy: Literal["latency", "weighted", "least_outstanding"] = "latency",
+        weights: Optional[List[float]] = None,
+        names: Optional[List[str]] = None,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+    ):
+        if not backends:
+            raise ValueError("RouterLlm needs at least one backend")
+        super().__init__(
+            model=backends[0].model,
+            policy=policy,
+            alpha=alpha,
+            failure_threshold=failure_threshold,
+            cooldown_seconds=cooldown_seconds,
+        )
+        weights = weights or [1.0] * len(backends)
+        names = names or [f"{backend.model}#{i}" for i, backend in enumerate(backends)]
+        self._backends = list(zip(
+            backends,
+            [BackendStats(name=name, weight=weight) for name, weight in zip(names, weights)],
+        ))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-backend statistics for dashboards"""
+        return [{**asdict(stats), "healthy": stats.healthy} for _, stats in self._backends]
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        return await self._route(
+            lambda llm: llm.generate(request),
+            lambda response: bool(response.error_message),
+        )
+
+    async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
+        return await self._route(
+            lambda llm: llm.generate_structured(messages, response_format),
+            lambda result: isinstance(result, dict) and "error" in result,
+        )
+
+    async def embed(self, model, texts: List[str]) -> List[List[float]]:
+        return await self._route(
+            lambda llm: llm.embed(model, texts),
+            lambda result: isinstance(result, dict) and "error" in result,
+        )
+
+    async def generate_stream(self, request: LlmRequest):
+        """Stream from the best backend; fail over only before the first token"""
+        ranked = self._rank()
+        for position, (llm, stats) in enumerate(ranked):
+            is_last = position == len(ranked) - 1
+            started = False
+            # None leaves the backend's health untouched: the consumer stopped
+            # reading or was cancelled, which says nothing about the backend
+            failed = None
+            start = self._begin(stats)
+            try:
+                response = None
+                async for item in llm.generate_stream(request):
+                    if isinstance(item, TokenDelta):
+                        started = True
+                        yield item
+                    else:
+                        response = item
+                        break
+                if response is None:
+                    response = LlmResponse(error_message=f"Stream from {stats.name} ended without a response")
+                failed = bool(response.error_message)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self._finish(stats, start, failed)
+            if failed and not started and not is_last:
+                continue
+            yield response
+            return
+
+    async def _route(self, call, is_error):
+        result = None
+        error = None
+        for llm, stats in self._rank():
+            start = self._begin(stats)
+            try:
+                result = await call(llm)
+                error = None
+                failed = is_error(result)
+            except Exception as e:
+                error = e
+                failed = True
+            self._finish(stats, start, failed)
+            if not failed:
+                return result
+        if error is not None:
+            raise error
+        return result
+
+    def _rank(self):
+        """Backends in the order they should be tried"""
+        healthy = [entry for entry in self._backends if entry[1].healthy]
+        # With every backend in cooldown, try the one that recovers first
+        candidates = healthy or sorted(self._backends, key=lambda entry: entry[1].unhealthy_until)
+
+        if self.policy == "weighted":
+            # Weighted random order (Efraimidis-Spirakis sampling)
+            return sorted(
+                candidates,
+                key=lambda entry: random.random() ** (1.0 / max(entry[1].weight, 1e-9)),
+                reverse=True,
+            )
+        if self.policy == "least_outstanding":
+            return sorted(candidates, key=lambda entry: (entry[1].outstanding, entry[1].ewma_latency or 0.0))
+        return sorted(candidates, key=lambda entry: self._latency_score(entry[1]))
+
+    @staticmethod
+    def _latency_score(stats: BackendStats) -> float:
+        if stats.ewma_latency is None:
+            return -1.0
+        return stats.ewma_latency * (1 + 4 * stats.ewma_error_rate)
+
+    def _begin(self, stats: BackendStats) -> float:
+        stats.outstanding += 1
+        stats.requests += 1
+        return time.monotonic()
+
+    def _finish(self, stats: BackendStats, start: float, failed: Optional[bool]) -> None:
+        stats.outstanding -= 1
+        if failed is None:
+            return
+        stats.ewma_error_rate = self.alpha * float(failed) + (1 - self.alpha) * stats.ewma_error_rate
+        if failed:
+            stats.errors += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.unhealthy_until = time.monotonic() + self.cooldown_seconds
+            return
+        # Latency is only tracked for successes: fast failures would look attractive
+        latency = time.monotonic() - start
+        if stats.ewma_latency is None:
+            stats.ewma_latency = latency
+        else:
+            stats.ewma_latency = self.alpha * latency + (1 - self.alpha) * stats.ewma_latency
+        stats.consecutive_failures = 0
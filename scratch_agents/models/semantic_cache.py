@@ -0,0 +1,288 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .cached_llm import request_cache_key
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from .llm_wrapper import LlmWrapper
+from ..types.contents import Message
+from ..types.stream_events import TokenDelta
+
+
+@dataclass
+class SemanticCacheStats:
+    """Counters of a semantic response cache"""
+    lookups: int = 0
+    hits: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+    saved_latency_seconds: float = 0.0
+    embed_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class SemanticIndex:
+    """Fixed-capacity vector index over normalized float32 embeddings
+
+    Vectors live in one (capacity, dim) matrix, memory-mapped from
+    `path/vectors.npy` when a path is given. Entry metadata is appended to
+    `path/entries.jsonl` and replayed on load, last write per slot wins.
+    The log is rewritten with only the live entries once reused slots make
+    up more than half of it. Each entry carries a scope; a search only
+    matches entries of the same scope.
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = path
+        self.size = 0
+        self.vectors = None
+        self.scopes = np.zeros(capacity, dtype=np.int64)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.latency = np.zeros(capacity, dtype=np.float32)
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.responses = [None] * capacity
+        self._log_lines = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def search(self, vector: np.ndarray, scope: int, min_created_at: float) -> Optional[Tuple[int, float]]:
+        """Return (slot, cosine similarity) of the closest live entry in the scope"""
+        if self.size == 0:
+            return None
+        mask = self.valid[:self.size] & (self.scopes[:self.size] == scope)
+        mask &= self.created_at[:self.size] >= min_created_at
+        if not mask.any():
+            return None
+        similarities = np.where(mask, self.vectors[:self.size] @ vector, -np.inf)
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def insert(self, vector: np.ndarray, scope: int, response: str, latency: float,
+               min_created_at: float) -> bool:
+        """Insert an entry and return True if another entry was evicted for it"""
+        if self.vectors is None:
+            self._allocate(vector.shape[0])
+        slot, evicted = self._free_slot(min_created_at)
+        now = time.time()
+        self.vectors[slot] = vector
+        self.scopes[slot] = scope
+        self.created_at[slot] = now
+        self.last_used[slot] = now
+        self.latency[slot] = latency
+        self.valid[slot] = True
+        self.responses[slot] = response
+        if self.path:
+            with open(os.path.join(self.path, "entries.jsonl"), "a", encoding="utf-8") as f:
+                f.write(self._entry_line(slot))
+            self._log_lines += 1
+            if self._log_lines > 2 * self.size:
+                self._compact_log()
+        return evicted
+
+    def _entry_line(self, slot: int) -> str:
+        return json.dumps({
+            "slot": slot, "scope": int(self.scopes[slot]),
+            "created_at": float(self.created_at[slot]),
+            "latency": float(self.latency[slot]), "response": self.responses[slot],
+        }) + "\n"
+
+    def _compact_log(self) -> None:
+        """Rewrite entries.jsonl with one line per live slot"""
+        entries_path = os.path.join(self.path, "entries.jsonl")
+        with open(entries_path + ".tmp", "w", encoding="utf-8") as f:
+            for slot in np.flatnonzero(self.valid[:self.size]):
+                f.write(self._entry_line(int(slot)))
+        os.replace(entries_path + ".tmp", entries_path)
+        self._log_lines = int(self.valid[:self.size].sum())
+
+    def _free_slot(self, min_created_at: float) -> Tuple[int, bool]:
+        if self.size < self.capacity:
+            self.size += 1
+            return self.size - 1, False
+        # Reuse an expired entry before evicting the least recently used one
+        expired = np.flatnonzero(~self.valid | (self.created_at < min_created_at))
+        if expired.size:
+            return int(expired[0]), False
+        return int(np.argmin(self.last_used)), True
+
+    def _allocate(self, dim: int) -> None:
+        if self.path:
+            self.vectors = np.lib.format.open_memmap(
+                os.path.join(self.path, "vectors.npy"), mode="w+",
+                dtype=np.float32, shape=(self.capacity, dim),
+            )
+        else:
+            self.vectors = np.zeros((self.capacity, dim), dtype=np.float32)
+
+    def _load(self) -> None:
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        entries_path = os.path.join(self.path, "entries.jsonl")
+        if not os.path.exists(vectors_path) or not os.path.exists(entries_path):
+            return
+        vectors = np.load(vectors_path, mmap_mode="r+")
+        if vectors.shape[0] != self.capacity:
+            # Capacity changed: start over rather than misreading slots
+            del vectors
+            os.remove(entries_path)
+            return
+        self.vectors = vectors
+        with open(entries_path, encoding="utf-8") as f:
+            for line in f:
+                self._log_lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                slot = entry["slot"]
+                self.scopes[slot] = entry["scope"]
+                self.created_at[slot] = entry["created_at"]
+                self.last_used[slot] = entry["created_at"]
+                self.latency[slot] = entry["latency"]
+                self.responses[slot] = entry["response"]
+                self.valid[slot] = True
+                self.size = max(self.size, slot + 1)
+
+
+class SemanticCacheLlm(LlmWrapper):
+    """LLM wrapper that answers paraphrased questions from a semantic cache
+
+    The last user message of a request is embedded and compared against
+    earlier questions. A cached response is returned when the cosine
+    similarity reaches similarity_threshold and everything else about the
+    request matches: model, sampling config, instructions, tool definitions
+    and the conversation before the last message. Only requests that end
+    with a user message are looked up.
+
+    Example:
+        model = SemanticCacheLlm(OpenAILlm("gpt-4o-mini"), similarity_threshold=0.95)
+    """
+
+    similarity_threshold: float = 0.92
+    max_entries: int = 10_000
+    max_age_seconds: Optional[float] = None
+    embedding_model: str = "text-embedding-3-small"
+
+    def __init__(
+        self,
+        llm,
+        embedder=None,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 10_000,
+        max_age_seconds: Optional[float] = None,
+        embedding_model: str = "text-embedding-3-small",
+        index_path: Optional[str] = None,
+    ):
+        super().__init__(
+            llm,
+            similarity_threshold=similarity_threshold,
+            max_entries=max_entries,
+            max_age_seconds=max_age_seconds,
+            embedding_model=embedding_model,
+        )
+        # Anything with OpenAILlm's embed(model, texts) signature
+        self._embedder = embedder or llm
+        self._index = SemanticIndex(max_entries, index_path)
+        self._stats = SemanticCacheStats()
+
+    @property
+    def stats(self) -> SemanticCacheStats:
+        return self._stats
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        key = await self._lookup_key(request)
+        if key is None:
+            return await self._llm.generate(request)
+        vector, scope = key
+
+        if (cached := self._search(vector, scope)) is not None:
+            return cached
+
+        start = time.perf_counter()
+        response = await self._llm.generate(request)
+        self._store(vector, scope, response, time.perf_counter() - start)
+        return response
+
+    async def generate_stream(self, request: LlmRequest):
+        key = await self._lookup_key(request)
+        if key is None:
+            async for item in self._llm.generate_stream(request):
+                yield item
+            return
+        vector, scope = key
+
+        if (cached := self._search(vector, scope)) is not None:
+            for item in cached.content:
+                if isinstance(item, Message) and item.role == "assistant" and item.content:
+                    yield TokenDelta(text=item.content)
+            yield cached
+            return
+
+        start = time.perf_counter()
+        async for item in self._llm.generate_stream(request):
+            if isinstance(item, LlmResponse):
+                self._store(vector, scope, item, time.perf_counter() - start)
+            yield item
+
+    async def _lookup_key(self, request: LlmRequest) -> Optional[Tuple[np.ndarray, int]]:
+        """Embed the last user message and compute the request scope"""
+        last = request.contents[-1] if request.contents else None
+        if not isinstance(last, Message) or last.role != "user" or not last.content:
+            self._stats.bypassed += 1
+            return None
+
+        start = time.perf_counter()
+        embeddings = await self._embedder.embed(self.embedding_model, [last.content])
+        self._stats.embed_seconds += time.perf_counter() - start
+        if isinstance(embeddings, dict) or not embeddings:
+            # embed() reports failures as {"error": ...}; fall through to the model
+            self._stats.bypassed += 1
+            return None
+
+        vector = np.asarray(embeddings[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            self._stats.bypassed += 1
+            return None
+
+        scope_request = request.model_copy(update={"contents": request.contents[:-1]})
+        scope_key = request_cache_key(scope_request, self.model, self.llm_config)
+        scope = int(scope_key[:15], 16)
+        return vector / norm, scope
+
+    def _search(self, vector: np.ndarray, scope: int) -> Optional[LlmResponse]:
+        self._stats.lookups += 1
+        match = self._index.search(vector, scope, self._min_created_at())
+        if match is None:
+            return None
+        slot, similarity = match
+        if similarity < self.similarity_threshold:
+            return None
+        self._index.last_used[slot] = time.time()
+        self._stats.hits += 1
+        self._stats.saved_latency_seconds += float(self._index.latency[slot])
+        return LlmResponse.model_validate_json(self._index.responses[slot])
+
+    def _store(self, vector: np.ndarray, scope: int, response: LlmResponse, latency: float) -> None:
+        if response.error_message:
+            return
+        evicted = self._index.insert(
+            vector, scope, response.model_dump_json(), latency, self._min_created_at()
+        )
+        if evicted:
+            self._stats.evictions += 1
+
+    def _min_created_at(self) -> float:
+        if self.max_age_seconds is None:
+            return 0.0
+        return time.time() - self.max_age_seconds
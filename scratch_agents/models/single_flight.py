@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from pydantic import BaseModel
+
+from .cached_llm import request_cache_key
+from .llm_request import LlmRequest
+from .llm_response import LlmResponse
+from .llm_wrapper import LlmWrapper
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters of a SingleFlight group"""
+    executed: int = 0
+    coalesced: int = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one shared call
+
+    The first caller for a key starts the call as a separate task; callers
+    that arrive while it is running await the same task. A caller that is
+    cancelled only stops waiting. The shared call is cancelled only when
+    every caller waiting on it has gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = SingleFlightStats()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            self.stats.executed += 1
+        else:
+            self.stats.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting any more: stop the call, and make sure
+                # later callers start a fresh one instead of joining it.
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+def _hash_payload(payload: Any) -> str:
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SingleFlightLlm(LlmWrapper):
+    """LLM wrapper that sends one outbound call for identical concurrent requests
+
+    generate, generate_structured and embed are coalesced; every caller
+    receives its own copy of the shared response. Streaming calls are
+    passed through unchanged.
+    """
+
+    def __init__(self, llm):
+        super().__init__(llm)
+        self._flights = SingleFlight()
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        return self._flights.stats
+
+    async def generate(self, request: LlmRequest) -> LlmResponse:
+        key = ("generate", request_cache_key(request, self.model, self.llm_config))
+        response = await self._flights.do(key, lambda: self._llm.generate(request))
+        return response.model_copy(deep=True)
+
+    async def generate_structured(self, messages: List[Dict[str, Any]], response_format: BaseModel):
+        schema = response_format.model_json_schema() if isinstance(response_format, type) else str(response_format)
+        key = ("structured", _hash_payload([self.model, self.llm_config, messages, schema]))
+        result = await self._flights.do(
+            key, lambda: self._llm.generate_structured(messages, response_format)
+        )
+        return result.model_copy(deep=True) if isinstance(result, BaseModel) else result
+
+    async def embed(self, model, texts: List[str]) -> List[List[float]]:
+        key = ("embed", _hash_payload([model, texts]))
+        return await self._flights.do(key, lambda: self._llm.embed(model, texts))
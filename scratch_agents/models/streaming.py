@@ -0,0 +1,69 @@
+import json
+from typing import Any, Dict, Optional
+from .llm_response import LlmResponse
+from ..types.contents import Message, ToolCall
+
+
+class StreamAssembler:
+    """Assemble streamed chat completion chunks into an LlmResponse
+    
+    Works with OpenAI and LiteLLM chunks, which share the same shape: text
+    arrives in `delta.content` and tool calls arrive in `delta.tool_calls`
+    as fragments keyed by index, with the arguments JSON split across chunks.
+    """
+    
+    def __init__(self):
+        self.text_parts = []
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.usage = None
+        self._last_index = None
+    
+    def add_chunk(self, chunk) -> Optional[str]:
+        """Consume a chunk and return its text delta, if any"""
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+        
+        for tool_call_delta in getattr(delta, "tool_calls", None) or []:
+            self._add_tool_call_delta(tool_call_delta)
+        
+        text = getattr(delta, "content", None)
+        if text:
+            self.text_parts.append(text)
+        return text or None
+    
+    def _add_tool_call_delta(self, tool_call_delta) -> None:
+        index = getattr(tool_call_delta, "index", None)
+        if index is None:
+            # Some providers omit the index: a new id starts a new call
+            if tool_call_delta.id or self._last_index is None:
+                index = len(self.tool_calls)
+            else:
+                index = self._last_index
+        self._last_index = index
+        
+        entry = self.tool_calls.setdefault(index, {"id": None, "name": "", "arguments": []})
+        if tool_call_delta.id:
+            entry["id"] = tool_call_delta.id
+        function = getattr(tool_call_delta, "function", None)
+        if function is not None:
+            if function.name:
+                entry["name"] += function.name
+            if function.arguments:
+                entry["arguments"].append(function.arguments)
+    
+    def build_response(self, usage_metadata: Optional[Dict[str, Any]] = None) -> LlmResponse:
+        content_items = []
+        if self.text_parts:
+            content_items.append(Message(role="assistant", content="".join(self.text_parts)))
+        for index in sorted(self.tool_calls):
+            entry = self.tool_calls[index]
+            arguments = "".join(entry["arguments"])
+            content_items.append(ToolCall(
+                tool_call_id=entry["id"],
+                name=entry["name"],
+                arguments=json.loads(arguments) if arguments else {},
+            ))
+        return LlmResponse(content=content_items, usage_metadata=usage_metadata or {})
@@ -2,18 +2,53 @@
 
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional, Any
-import chromadb
-from chromadb.utils import embedding_functions
-from chromadb.config import Settings
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 import logging
 import os
 import uuid
 from .session import Session
+from .vector_store import VectorStore, ChromaVectorStore
+from ..models.embedding_service import EmbeddingService
+from ..models.rate_limiter import llm_priority, estimate_tokens, BACKGROUND
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class MemoryMaintenanceStats:
+    """Cost of the decide_actions calls of a cross-session manager"""
+    decide_calls: int = 0
+    candidates: int = 0
+    decide_prompt_tokens: int = 0
+    max_decide_prompt_tokens: int = 0
+    # Set by the distance pre-classification in plan_actions
+    decide_calls_avoided: int = 0
+    facts_noop: int = 0
+    facts_added: int = 0
+    facts_sent_to_llm: int = 0
+    # decide_calls that also extracted the memories (fused mode)
+    fused_calls: int = 0
+
+    @property
+    def mean_decide_prompt_tokens(self) -> float:
+        return self.decide_prompt_tokens / self.decide_calls if self.decide_calls else 0.0
+
+    @property
+    def mean_candidates(self) -> float:
+        """Existing memories shown per decide_actions call"""
+        return self.candidates / self.decide_calls if self.decide_calls else 0.0
+
+    @property
+    def decide_calls_avoided_ratio(self) -> float:
+        """Share of decisions made without an LLM call"""
+        total = self.decide_calls + self.decide_calls_avoided
+        return self.decide_calls_avoided / total if total else 0.0
+
+
 class BaseCrossSessionManager(ABC):
     """Abstract base class for cross-session memory management."""
     
@@ -22,7 +57,13 @@ class BaseCrossSessionManager(ABC):
         model,
         collection_name: str,
         persist_directory: str = "./cross_session_db",
-        embedding_model: str = "text-embedding-3-small"
+        embedding_model: str = "text-embedding-3-small",
+        embedding_cache_path: Optional[str] = None,
+        io_workers: int = 4,
+        vector_store: Optional[VectorStore] = None,
+        noop_distance: Optional[float] = None,
+        add_distance: Optional[float] = None,
+        fused: bool = False
     ):
         """Initialize the base cross-session manager.
         
@@ -31,31 +72,54 @@ class BaseCrossSessionManager(ABC):
             collection_name: Name of the ChromaDB collection
             persist_directory: Directory to persist ChromaDB data
             embedding_model: Optional custom embedding model
+            embedding_cache_path: Path prefix of the on-disk embedding cache;
+                defaults to a file inside persist_directory
+            io_workers: Threads of the executor that runs the blocking
+                vector store calls off the event loop
+            vector_store: Where memories are stored and searched, e.g. a
+                LocalVectorStore; defaults to a ChromaDB collection in
+                persist_directory
+            noop_distance: New facts whose nearest memory is at most this
+                cosine distance away are duplicates and skipped without an
+                LLM call (e.g. 0.05); None disables
+            add_distance: New facts whose nearest memory is at least this
+                far away, or that have none, are added without an LLM call
+                (e.g. 0.6); None disables
+            fused: Extract memories and decide their actions in one LLM
+                call (see extract_and_decide) instead of two
         """
         self.model = model
         self.collection_name = collection_name
         self.persist_directory = persist_directory
         self.embedding_model = embedding_model
-        
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
+        # Vector store calls block, so they run here instead of on the event loop
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=io_workers,
+            thread_name_prefix=f"{collection_name}-io"
         )
-        embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model_name=self.embedding_model
+        # Every embedding in sessions/ goes through this batching, caching service
+        self.embedder = EmbeddingService(
+            model,
+            model=embedding_model,
+            cache_path=embedding_cache_path or os.path.join(persist_directory, "embedding_cache", "vectors"),
         )
         
-        # Get or create collection
-        try:
-            self.collection = self.client.get_or_create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"},
-                embedding_function=embedding_function
-                )
-            logger.info(f"Using existing collection: {collection_name}")
-        except Exception:
-            logger.error(f"Error getting or creating collection: {collection_name}")
-            raise
+        self.vector_store = vector_store or ChromaVectorStore(
+            persist_directory,
+            collection_name,
+            embedding_model=embedding_model
+        )
+        # Bumped on every write for a user, so readers can tell that cached
+        # search results are stale
+        self._memory_versions: Dict[str, int] = {}
+        self.stats = MemoryMaintenanceStats()
+        self.noop_distance = noop_distance
+        self.add_distance = add_distance
+        self.fused = fused
+        # Nearest existing memories searched per new fact, and the token
+        # cap of the candidates shown to the LLM
+        self.candidates_per_fact = 5
+        self.max_candidate_tokens = 2000
     
     @abstractmethod
     async def extract_memories(
@@ -73,16 +137,36 @@ class BaseCrossSessionManager(ABC):
         """
         pass
     
+    async def extract_memories_batch(
+        self,
+        events_batch: List[List[Any]],
+    ) -> List[List[Any]]:
+        """Extract memories from several executions.
+        
+        The default runs extract_memories per execution concurrently;
+        managers override it to extract a whole batch in one LLM call.
+        
+        Args:
+            events_batch: Events of each execution
+            
+        Returns:
+            Extracted memories of each execution, in the same order
+        """
+        return list(await asyncio.gather(*(self.extract_memories(events) for events in events_batch)))
+    
     async def process_session(
         self,
         session: Session,
-        execution_id: str
+        execution_id: str,
+        raise_errors: bool = False
     ) -> None:
         """Process a completed session and extract/merge memories.
         
         Args:
             session: Session data containing events
             execution_id: Unique execution identifier
+            raise_errors: Re-raise failures after logging them, e.g. so a
+                BackgroundTaskRunner counts them in its stats
         """
         try:
             user_id = session.user_id
@@ -90,35 +174,165 @@ class BaseCrossSessionManager(ABC):
             
             events = [event for event in events if event.execution_id == execution_id]
             
-            memories = await self.extract_memories(events)
-            
-            if memories:
-                existing = await self.find_existing(memories, user_id)
-                actions = await self.decide_actions(memories, existing, user_id)
-                await self.execute_memory_actions(actions)
-            else:
-                logger.info(f"No memories extracted for user {user_id}")
+            # Memory maintenance is background work for rate-limited models
+            with llm_priority(BACKGROUND):
+                if self.fused:
+                    actions = await self.extract_and_decide(events, user_id)
+                    if actions:
+                        await self.execute_memory_actions(actions)
+                    return
+                
+                memories = await self.extract_memories(events)
+                
+                if memories:
+                    actions = await self.plan_actions(memories, user_id)
+                    await self.execute_memory_actions(actions)
+                else:
+                    logger.info(f"No memories extracted for user {user_id}")
                 
         except Exception as e:
             logger.error(f"Error processing session: {e}")
+            if raise_errors:
+                raise
+    
+    async def plan_actions(
+        self,
+        memories: List[Any],
+        user_id: str
+    ) -> List[Dict[str, Any]]:
+        """Decide the actions for new memories, asking the LLM only when needed.
+        
+        The nearest existing memories of every fact are searched once. With
+        noop_distance or add_distance set, facts with a near duplicate are
+        dropped and facts far from everything are added locally; only the
+        rest go through find_existing and decide_actions.
+        
+        Args:
+            memories: New memories from extract_memories
+            user_id: User identifier
+            
+        Returns:
+            Actions for execute_memory_actions
+        """
+        matches = await self.search_many(
+            [self._search_text(memory) for memory in memories],
+            user_id,
+            limit=self.candidates_per_fact
+        )
+        
+        actions = []
+        undecided = []
+        for memory, hits in zip(memories, matches):
+            distance = hits[0]["distance"] if hits else None
+            if self.noop_distance is not None and distance is not None and distance <= self.noop_distance:
+                self.stats.facts_noop += 1
+            elif self.add_distance is not None and (distance is None or distance >= self.add_distance):
+                actions.append(self._make_add_action(memory, user_id))
+                self.stats.facts_added += 1
+            else:
+                undecided.append((memory, hits))
+        
+        if not undecided:
+            self.stats.decide_calls_avoided += 1
+            return actions
+        
+        self.stats.facts_sent_to_llm += len(undecided)
+        undecided_memories = [memory for memory, _ in undecided]
+        existing = await self.find_existing(undecided_memories, user_id, matches=[hits for _, hits in undecided])
+        actions.extend(await self.decide_actions(undecided_memories, existing, user_id))
+        return actions
+    
+    async def extract_and_decide(
+        self,
+        events: List[Any],
+        user_id: str
+    ) -> List[Dict[str, Any]]:
+        """Extract memories and decide their actions (fused mode).
+        
+        Managers override this to search candidates by the raw user turns
+        and return facts and actions from a single LLM call. The default
+        runs extract_memories and plan_actions.
+        
+        Args:
+            events: Events of one execution
+            user_id: User identifier
+            
+        Returns:
+            Actions for execute_memory_actions
+        """
+        memories = await self.extract_memories(events)
+        if not memories:
+            return []
+        return await self.plan_actions(memories, user_id)
+    
+    @staticmethod
+    def _user_turns(events: List[Any]) -> List[str]:
+        """Contents of the user messages of an execution"""
+        return [
+            item.content
+            for event in events
+            for item in event.content
+            if getattr(item, "role", None) == "user" and item.content
+        ]
+    
+    def _merge_matches(self, matches: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Deduplicate search_many results into one candidate list.
+        
+        Matches are taken round-robin, nearest first, so each query keeps
+        its closest memories, until max_candidate_tokens is reached.
+        """
+        candidates = []
+        seen_ids = set()
+        tokens = 0
+        for rank in range(max((len(hits) for hits in matches), default=0)):
+            for hits in matches:
+                if rank >= len(hits) or hits[rank]["id"] in seen_ids:
+                    continue
+                match = hits[rank]
+                metadata = match["metadata"] or {}
+                candidate = {
+                    "id": match["id"],
+                    "content": match["content"],
+                    "metadata": metadata,
+                    "created_at": metadata.get("created_at", "Unknown"),
+                    "updated_at": metadata.get("updated_at", "Unknown"),
+                    "distance": match["distance"]
+                }
+                tokens += estimate_tokens(str(candidate))
+                if tokens > self.max_candidate_tokens:
+                    return candidates
+                seen_ids.add(match["id"])
+                candidates.append(candidate)
+        return candidates
+    
+    def _search_text(self, memory: Any) -> str:
+        """Text a new memory is searched by"""
+        return memory
+    
+    def _make_add_action(self, memory: Any, user_id: str) -> Dict[str, Any]:
+        """ADD action for a memory that needs no LLM decision"""
+        return {"action": "ADD", "memory": memory, "user_id": user_id}
     
     async def find_existing(
         self,
         memories: List[str],
-        user_id: str
+        user_id: str,
+        matches: Optional[List[List[Dict[str, Any]]]] = None
     ) -> List[Dict[str, Any]]:
         """Find existing memories.
         
         Args:
             memories: List of new memory strings to merge
             user_id: User identifier
+            matches: search_many results of the memories, when already searched
             
         Returns:
             List of existing memories with metadata
         """
+        if matches is None:
+            matches = await self.search_many(memories, user_id, limit=self.candidates_per_fact)
         existing_memories = []
-        for memory in memories:
-            existing = await self.search(memory, user_id)
+        for existing in matches:
             if existing:    
                 existing_memories.append(existing)
         return existing_memories
@@ -137,18 +351,102 @@ class BaseCrossSessionManager(ABC):
         self,
         actions: List[Dict[str, Any]]
     ) -> None:
-        """Execute memory actions."""
+        """Execute memory actions.
+        
+        All ADD and UPDATE actions are written with one batched embedding
+        call and one vector store upsert; DELETE actions follow in one delete.
+        An action is embedded by its "embed_text" when set, else its memory.
+        """
+        writes = []
+        delete_ids = []
         for action in actions:
-            if action["action"] == "ADD":
-                metadata = action.get("metadata", {})
-                await self.add(action["memory"], action["user_id"], action.get("embedding"), metadata)
+            if action["action"] in ("ADD", "UPDATE") and not action.get("memory"):
+                logger.warning(f"Skipping {action['action']} action without memory content")
+            elif action["action"] == "ADD":
+                writes.append(action)
             elif action["action"] == "UPDATE":
-                metadata = action.get("metadata", {})
-                await self.update(action["memory_id"], action["memory"], action.get("embedding"), metadata)
-            elif action["action"] == "DELETE":
-                await self.delete(action["memory_id"])
-            elif action["action"] == "NOOP":
-                pass
+                if not action.get("memory_id"):
+                    logger.error("Cannot update memory: memory_id is None")
+                    continue
+                writes.append(action)
+            elif action["action"] == "DELETE" and action.get("memory_id"):
+                delete_ids.append(action["memory_id"])
+        
+        # Stored metadata of updated and deleted memories: updates keep it,
+        # and it names the users whose memories change
+        touched_ids = [action["memory_id"] for action in writes if action["action"] == "UPDATE"] + delete_ids
+        existing_metadata = {}
+        if touched_ids:
+            existing = await self._run_io(self.vector_store.get, ids=touched_ids)
+            existing_metadata = dict(zip(existing["ids"], existing["metadatas"] or []))
+        user_ids = {action["user_id"] for action in writes if action.get("user_id")}
+        user_ids.update(metadata["user_id"] for metadata in existing_metadata.values() if metadata and metadata.get("user_id"))
+        
+        if writes:
+            missing = [action.get("embed_text") or action["memory"] for action in writes if not action.get("embedding")]
+            computed = iter(await self.embedder.embed(missing)) if missing else iter(())
+            embeddings = [action.get("embedding") or next(computed) for action in writes]
+            
+            ids, metadatas = [], []
+            for action in writes:
+                if action["action"] == "ADD":
+                    ids.append(f"{uuid.uuid4()}")
+                    metadatas.append(self._new_metadata(action["user_id"], action.get("metadata")))
+                else:
+                    ids.append(action["memory_id"])
+                    metadatas.append(self._updated_metadata(existing_metadata.get(action["memory_id"]), action.get("metadata")))
+            await self._run_io(
+                self.vector_store.upsert,
+                ids=ids,
+                documents=[action["memory"] for action in writes],
+                embeddings=embeddings,
+                metadatas=metadatas
+            )
+        
+        if delete_ids:
+            await self._run_io(self.vector_store.delete, ids=delete_ids)
+        
+        self._bump_memory_versions(user_ids)
+    
+    def memory_version(self, user_id: str) -> int:
+        """Counter that changes whenever the memories of user_id are written"""
+        return self._memory_versions.get(user_id, 0)
+    
+    def _bump_memory_versions(self, user_ids) -> None:
+        for user_id in user_ids:
+            self._memory_versions[user_id] = self._memory_versions.get(user_id, 0) + 1
+    
+    def _record_decide_prompt(self, messages: List[Dict[str, str]], existing: List[Dict[str, Any]]) -> None:
+        """Track the size of a decide_actions prompt"""
+        tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        self.stats.decide_calls += 1
+        self.stats.candidates += len(existing)
+        self.stats.decide_prompt_tokens += tokens
+        self.stats.max_decide_prompt_tokens = max(self.stats.max_decide_prompt_tokens, tokens)
+    
+    @staticmethod
+    def _new_metadata(user_id: str, additional_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        metadata = {
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now
+        }
+        # Add any additional metadata (like the original structured data)
+        if additional_metadata:
+            metadata.update(additional_metadata)
+        return metadata
+    
+    @staticmethod
+    def _updated_metadata(
+        existing_metadata: Optional[Dict[str, Any]],
+        additional_metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        metadata = dict(existing_metadata or {})
+        metadata["updated_at"] = datetime.now().isoformat()
+        if additional_metadata:
+            metadata.update(additional_metadata)
+        return metadata
     
     async def search(
         self,
@@ -166,32 +464,57 @@ class BaseCrossSessionManager(ABC):
         Returns:
             List of relevant memories with metadata
         """
+        return (await self.search_many([query], user_id, limit))[0]
+    
+    async def search_many(
+        self,
+        queries: List[str],
+        user_id: str,
+        limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for several queries with one embedding batch and one query call.
+        
+        Args:
+            queries: Search queries
+            user_id: User identifier
+            limit: Maximum number of results per query
+            
+        Returns:
+            One list of relevant memories per query, in query order
+        """
+        if not queries:
+            return []
         try:
             # Filter by user_id in metadata
             where = {"user_id": user_id}
+            query_embeddings = await self.embedder.embed(queries)
             
-            results = self.collection.query(
-                query_texts=[query],
+            results = await self._run_io(
+                self.vector_store.query,
+                query_embeddings=query_embeddings,
                 n_results=limit,
                 where=where
             )
-            
-            memories = []
-            if results["documents"] and results["documents"][0]:
-                for i, doc in enumerate(results["documents"][0]):
-                    memory = {
-                        "id": results["ids"][0][i] if results["ids"] and results["ids"][0] else None,
-                        "content": doc,
-                        "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                        "distance": results["distances"][0][i] if results["distances"] else 0
-                    }
-                    memories.append(memory)
-            
-            return memories
+            return [self._parse_results(results, i) for i in range(len(queries))]
             
         except Exception as e:
             logger.error(f"Error searching memories: {e}")
-            return []
+            return [[] for _ in queries]
+    
+    @staticmethod
+    def _parse_results(results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """Memories matched by the query at index of a vector store query result"""
+        documents = results["documents"][index] if results["documents"] else []
+        memories = []
+        for i, doc in enumerate(documents or []):
+            memory = {
+                "id": results["ids"][index][i] if results["ids"] and results["ids"][index] else None,
+                "content": doc,
+                "metadata": results["metadatas"][index][i] if results["metadatas"] else {},
+                "distance": results["distances"][index][i] if results["distances"] else 0
+            }
+            memories.append(memory)
+        return memories
     
     async def add(
         self,
@@ -203,39 +526,27 @@ class BaseCrossSessionManager(ABC):
         """Add a new memory.
         
         Args:
-            memory: Memory content (as string for ChromaDB)
+            memory: Memory content
             user_id: User identifier
-            embedding: Optional embedding vector
+            embedding: Optional embedding vector; computed by self.embedder when omitted
             additional_metadata: Additional metadata to store
             
         Returns:
             Memory ID
         """
         memory_id = f"{uuid.uuid4()}"
+        final_metadata = self._new_metadata(user_id, additional_metadata)
         
-        final_metadata = {
-            "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        # Add any additional metadata (like the original structured data)
-        if additional_metadata:
-            final_metadata.update(additional_metadata)
-        
-        if embedding:
-            self.collection.upsert(
-                documents=[memory],
-                ids=[memory_id],
-                embeddings=[embedding],
-                metadatas=[final_metadata]
-            )
-        else:
-            self.collection.add(
-                documents=[memory],
-                ids=[memory_id],
-                metadatas=[final_metadata]
-            )
+        if not embedding:
+            embedding = await self.embedder.embed_one(memory)
+        await self._run_io(
+            self.vector_store.upsert,
+            documents=[memory],
+            ids=[memory_id],
+            embeddings=[embedding],
+            metadatas=[final_metadata]
+        )
+        self._bump_memory_versions([user_id])
         
         return memory_id
     
@@ -250,8 +561,8 @@ class BaseCrossSessionManager(ABC):
         
         Args:
             memory_id: ID of memory to update
-            memory: New memory content (as string for ChromaDB)
-            embedding: Optional embedding of the memory
+            memory: New memory content
+            embedding: Optional embedding of the memory; computed by self.embedder when omitted
             additional_metadata: Additional metadata to update
         """
         if not memory_id:
@@ -259,31 +570,21 @@ class BaseCrossSessionManager(ABC):
             return
             
         # Get existing metadata
-        existing = self.collection.get(ids=[memory_id])
-        if existing["metadatas"] and existing["metadatas"][0]:
-            final_metadata = existing["metadatas"][0].copy()
-            final_metadata["updated_at"] = datetime.now().isoformat()
-        else:
-            final_metadata = {}
-            final_metadata["updated_at"] = datetime.now().isoformat()
-        
-        # Update with any additional metadata
-        if additional_metadata:
-            final_metadata.update(additional_metadata)
+        existing = await self._run_io(self.vector_store.get, ids=[memory_id])
+        existing_metadata = existing["metadatas"][0] if existing["metadatas"] else None
+        final_metadata = self._updated_metadata(existing_metadata, additional_metadata)
             
-        if embedding:
-            self.collection.upsert(
-                ids=[memory_id],
-                documents=[memory],
-                embeddings=[embedding],
-                metadatas=[final_metadata]
-            )
-        else:
-            self.collection.upsert(
-                ids=[memory_id],
-                documents=[memory],
-                metadatas=[final_metadata]
-            )
+        if not embedding:
+            embedding = await self.embedder.embed_one(memory)
+        await self._run_io(
+            self.vector_store.upsert,
+            ids=[memory_id],
+            documents=[memory],
+            embeddings=[embedding],
+            metadatas=[final_metadata]
+        )
+        if final_metadata.get("user_id"):
+            self._bump_memory_versions([final_metadata["user_id"]])
     
     async def delete(
         self,
@@ -294,4 +595,13 @@ class BaseCrossSessionManager(ABC):
         Args:
             memory_id: ID of memory to delete
         """
-        self.collection.delete(ids=[memory_id])
\ No newline at end of file
+        existing = await self._run_io(self.vector_store.get, ids=[memory_id])
+        await self._run_io(self.vector_store.delete, ids=[memory_id])
+        self._bump_memory_versions(
+            metadata["user_id"] for metadata in existing["metadatas"] or [] if metadata and metadata.get("user_id")
+        )
+    
+    async def _run_io(self, fn, *args, **kwargs):
+        """Run a blocking vector store call on the manager's I/O executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, functools.partial(fn, *args, **kwargs))
\ No newline at end of file
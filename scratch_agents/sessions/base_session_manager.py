@@ -25,4 +25,8 @@ class BaseSessionManager(ABC):
     @abstractmethod
     def add_event(self, session: Session, event: Event) -> None:
         """Add an event to the session"""
-        pass
\ No newline at end of file
+        pass
+    
+    def delete_session(self, session_id: str) -> None:
+        """Remove a session from storage; a no-op unless the manager overrides it"""
+        pass
@@ -26,5 +26,8 @@ class InMemorySessionManager(BaseSessionManager):
         return self.sessions[session_id]
 
     def add_event(self, session: Session, event: Event) -> None:
-        session.events.append(event)
-        session.last_updated_at = datetime.now()
\ No newline at end of file
+        session.add_event(event)
+        session.last_updated_at = datetime.now()
+
+    def delete_session(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
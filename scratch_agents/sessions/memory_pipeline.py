@@ -0,0 +1,254 @@
+"""Queue-based cross-session memory pipeline."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .base_cross_session_manager import BaseCrossSessionManager
+from .session import Session
+from ..models.rate_limiter import llm_priority, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryJob:
+    """One completed execution waiting for memory processing"""
+    user_id: str
+    execution_id: str
+    events: List[Any]
+    submitted_at: float = field(default_factory=time.monotonic)
+    memories: List[Any] = field(default_factory=list)
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class MemoryPipelineStats:
+    """Throughput counters of a MemoryPipeline"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    extract_batches: int = 0
+    decided: int = 0
+    write_batches: int = 0
+    actions_written: int = 0
+    total_latency_seconds: float = 0.0
+
+    @property
+    def mean_extract_batch_size(self) -> float:
+        return self.submitted / self.extract_batches if self.extract_batches else 0.0
+
+    @property
+    def mean_latency_seconds(self) -> float:
+        """Mean time from submission to the memories being written"""
+        return self.total_latency_seconds / self.completed if self.completed else 0.0
+
+
+class MemoryPipeline:
+    """Process completed executions in batched, concurrent stages
+
+    Executions pass through three queues, each with its own workers:
+
+    - extract: executions from many sessions are grouped (up to
+      extract_batch_size, waiting at most batch_window seconds) into one
+      extract_memories_batch call
+    - decide: plan_actions per execution; executions of the same user
+      wait in a per-user FIFO and are dispatched one at a time, once the
+      previous one is written, so each sees its writes while workers
+      never block on a user; with a fused manager this stage also
+      extracts, in the same LLM call, and the extract stage only
+      forwards executions
+    - write: actions of several executions are combined into one
+      execute_memory_actions call (one embedding batch, one upsert)
+
+    The pipeline is an after_run callback:
+
+        pipeline = MemoryPipeline(UserCrossSessionManager(model))
+        agent = ToolCallingAgent(..., after_run_callbacks=[pipeline])
+        ...
+        await pipeline.close()
+    """
+
+    def __init__(
+        self,
+        manager: BaseCrossSessionManager,
+        extract_batch_size: int = 8,
+        write_batch_size: int = 32,
+        batch_window: float = 0.5,
+        extract_workers: int = 2,
+        decide_workers: int = 4,
+        write_workers: int = 1,
+        max_queue_size: int = 1000,
+    ):
+        self.manager = manager
+        self.extract_batch_size = extract_batch_size
+        self.write_batch_size = write_batch_size
+        self.batch_window = batch_window
+        self.extract_workers = extract_workers
+        self.decide_workers = decide_workers
+        self.write_workers = write_workers
+        self.max_queue_size = max_queue_size
+        self.stats = MemoryPipelineStats()
+        self._extract_queue: Optional[asyncio.Queue] = None
+        self._decide_queue: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Users with an execution being decided or written -> their next executions
+        self._user_queues: Dict[str, deque] = {}
+        self._pending = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    async def __call__(self, context) -> None:
+        """Queue the execution of an agent run (after_run callback)"""
+        await self.submit(context.session, context.execution_id)
+
+    async def submit(self, session: Session, execution_id: str) -> None:
+        """Queue one completed execution; waits only while the extract queue is full"""
+        self._start()
+        events = [event for event in session.events if event.execution_id == execution_id]
+        self._pending += 1
+        self._idle.clear()
+        self.stats.submitted += 1
+        await self._extract_queue.put(MemoryJob(session.user_id, execution_id, events))
+
+    @property
+    def queue_depths(self) -> Dict[str, int]:
+        queues = {"extract": self._extract_queue, "decide": self._decide_queue, "write": self._write_queue}
+        return {name: queue.qsize() if queue is not None else 0 for name, queue in queues.items()}
+
+    async def drain(self) -> None:
+        """Wait until every submitted execution has been written or has failed"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        """Drain, then stop the workers"""
+        await self.drain()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._extract_queue = self._decide_queue = self._write_queue = None
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+        self._extract_queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._decide_queue = asyncio.Queue()
+        self._write_queue = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = (
+            [asyncio.create_task(self._extract_worker()) for _ in range(self.extract_workers)]
+            + [asyncio.create_task(self._decide_worker()) for _ in range(self.decide_workers)]
+            + [asyncio.create_task(self._write_worker()) for _ in range(self.write_workers)]
+        )
+
+    def _finish(self, jobs: List[MemoryJob], failed: bool = False) -> None:
+        now = time.monotonic()
+        for job in jobs:
+            if failed:
+                self.stats.failed += 1
+            else:
+                self.stats.completed += 1
+                self.stats.total_latency_seconds += now - job.submitted_at
+        self._pending -= len(jobs)
+        if self._pending == 0:
+            self._idle.set()
+
+    async def _collect(self, queue: asyncio.Queue, max_size: int) -> List[Any]:
+        """Take one item, then whatever else arrives within the batch window"""
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < max_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _dispatch(self, job: MemoryJob) -> None:
+        """Send a job to the decide stage, or queue it behind its user's running job"""
+        waiting = self._user_queues.get(job.user_id)
+        if waiting is not None:
+            waiting.append(job)
+            return
+        self._user_queues[job.user_id] = deque()
+        self._decide_queue.put_nowait(job)
+
+    def _release(self, user_id: str) -> None:
+        """The user's running job is done: dispatch the next one, if any"""
+        waiting = self._user_queues.get(user_id)
+        if waiting:
+            self._decide_queue.put_nowait(waiting.popleft())
+        else:
+            self._user_queues.pop(user_id, None)
+
+    async def _extract_worker(self) -> None:
+        while True:
+            jobs = await self._collect(self._extract_queue, self.extract_batch_size)
+            if self.manager.fused:
+                # Fused managers extract while deciding, one call per execution
+                for job in jobs:
+                    self._dispatch(job)
+                continue
+            self.stats.extract_batches += 1
+            try:
+                with llm_priority(BACKGROUND):
+                    extracted = await self.manager.extract_memories_batch([job.events for job in jobs])
+            except Exception as e:
+                logger.error(f"Error extracting memories for {len(jobs)} executions: {e}")
+                self._finish(jobs, failed=True)
+                continue
+            for job, memories in zip(jobs, extracted):
+                if memories:
+                    job.memories = memories
+                    self._dispatch(job)
+                else:
+                    self._finish([job])
+
+    async def _decide_worker(self) -> None:
+        while True:
+            job = await self._decide_queue.get()
+            await self._decide(job)
+
+    async def _decide(self, job: MemoryJob) -> None:
+        try:
+            with llm_priority(BACKGROUND):
+                if self.manager.fused:
+                    job.actions = await self.manager.extract_and_decide(job.events, job.user_id)
+                else:
+                    job.actions = await self.manager.plan_actions(job.memories, job.user_id)
+            self.stats.decided += 1
+        except Exception as e:
+            logger.error(f"Error deciding memory actions for user {job.user_id}: {e}")
+            self._finish([job], failed=True)
+            self._release(job.user_id)
+            return
+        # The user's next job is dispatched once these actions are written
+        self._write_queue.put_nowait(job)
+
+    async def _write_worker(self) -> None:
+        while True:
+            jobs = await self._collect(self._write_queue, self.write_batch_size)
+            actions = [action for job in jobs for action in job.actions]
+            failed = False
+            try:
+                await self.manager.execute_memory_actions(actions)
+                self.stats.write_batches += 1
+                self.stats.actions_written += len(actions)
+            except Exception as e:
+                logger.error(f"Error writing {len(actions)} memory actions: {e}")
+                failed = True
+            self._finish(jobs, failed=failed)
+            for job in jobs:
+                self._release(job.user_id)
@@ -1,5 +1,5 @@
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Dict, Any
 from datetime import datetime
 from ..types.contents import ContentItem
@@ -12,6 +12,10 @@ class Session(BaseModel):
     state: Dict[str, Any] = Field(default_factory=dict)
     last_updated_at: datetime = Field(default_factory=datetime.now)
     
+    # Flattened content of all events, appended to as events arrive
+    _content_log: List[ContentItem] = PrivateAttr(default_factory=list)
+    _logged_events: int = PrivateAttr(default=0)
+    
     @property
     def core_memory(self) -> Dict[str, str]:
         """Access core memory with automatic initialization"""
@@ -20,4 +24,27 @@ class Session(BaseModel):
                 "persona": "You are a helpful AI assistant",
                 "human": ""
             }
-        return self.state["core_memory"]
\ No newline at end of file
+        return self.state["core_memory"]
+    
+    def add_event(self, event) -> None:
+        """Append an event and extend the content log with its content"""
+        self._sync_content_log()
+        self.events.append(event)
+        self._content_log.extend(event.content)
+        self._logged_events += 1
+    
+    @property
+    def contents(self) -> List[ContentItem]:
+        """All content items of the session in event order"""
+        self._sync_content_log()
+        return self._content_log
+    
+    def _sync_content_log(self) -> None:
+        """Catch up with events that were appended to `events` directly"""
+        if self._logged_events > len(self.events):
+            # Events were removed or replaced, rebuild from scratch
+            self._content_log = []
+            self._logged_events = 0
+        for event in self.events[self._logged_events:]:
+            self._content_log.extend(event.content)
+        self._logged_events = len(self.events)
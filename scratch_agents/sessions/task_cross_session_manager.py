@@ -56,6 +56,11 @@ Examples of GOOD task memories:
 }
 """
 
+BATCH_EXTRACT_INSTRUCTIONS = """
+You are given several numbered conversations. Extract one task memory per
+conversation and tag it with the conversation number.
+"""
+
 MEMORY_ACTION_PROMPT = """
 You are a Task Memory Action Decider specializing in tracking agent actions and problem-solving attempts.
 You are given a list of new task memories and a list of existing task memories.
@@ -81,18 +86,43 @@ class TaskMemory(BaseModel):
     success: bool = Field(description="Whether the task was completed successfully")
     key_discoveries: Optional[str] = Field(default=None, description="Important information discovered during the task")
     
+class IndexedTaskMemory(TaskMemory):
+    """Task memory of one conversation of a batch."""
+    conversation_id: int = Field(description="The number of the conversation the task comes from")
+
+class BatchedTaskMemories(BaseModel):
+    """Task memories of several conversations."""
+    memories: List[IndexedTaskMemory] = Field(description="One task memory per conversation")
+    
 class MemoryAction(BaseModel):
     """Memory action."""
     action: Literal["ADD", "UPDATE", "DELETE", "NOOP"] = Field(description="The action to take with the memory")
     memory_id: Optional[str] = Field(description="The id of the memory to update or delete")
 
 
+FUSED_INSTRUCTIONS = """
+You are given the existing task memories and a new conversation.
+First extract the task memory of the conversation, following the extraction rules; use null if the agent did no task.
+Then decide the action for it against the existing task memories, following the action rules.
+"""
+
+
+class FusedTaskUpdate(BaseModel):
+    """Task memory of a conversation and the action that stores it."""
+    memory: Optional[TaskMemory] = Field(description="The task memory of the conversation, or null if there is none")
+    action: MemoryAction = Field(description="The action to take with the task memory")
+
+
 class TaskCrossSessionManager(BaseCrossSessionManager):
     """Manage task-specific memories across sessions."""
     
     def __init__(self, model, 
                  collection_name="task_memories", 
                  persist_directory="./cross_session_db",
+                 vector_store=None,
+                 noop_distance=None,
+                 add_distance=None,
+                 fused=False,
                  ):
         """Initialize task cross-session manager.
         
@@ -100,22 +130,18 @@ class TaskCrossSessionManager(BaseCrossSessionManager):
             model: LLM model for memory extraction
             collection_name: Name of the ChromaDB collection
             persist_directory: Directory to persist ChromaDB data
+            vector_store: Optional VectorStore used instead of ChromaDB
+            noop_distance: Distance below which a task is a duplicate (no LLM call)
+            add_distance: Distance above which a task is added (no LLM call)
+            fused: Extract the task and decide its action in one LLM call
         """
-        super().__init__(model, collection_name, persist_directory)
+        super().__init__(model, collection_name, persist_directory, vector_store=vector_store,
+                         noop_distance=noop_distance, add_distance=add_distance, fused=fused)
+        # Only the closest stored task is compared
+        self.candidates_per_fact = 1
     
     async def extract_memories(self, events: List[Event]):
-        conversation_parts = []
-        
-        for event in events:
-            for item in event.content:
-                if isinstance(item, Message):
-                    conversation_parts.append(f"{item.role}: {item.content}")
-                elif isinstance(item, ToolCall):
-                    conversation_parts.append(f"{item.tool_call_id}: {item.name}")
-                elif isinstance(item, ToolResult):
-                    conversation_parts.append(f"{item.tool_call_id}: {item.name} {item.content}")
-        
-        conversation = "\n".join(conversation_parts)
+        conversation = self._format_conversation(events)
 
         user_prompt = f"""Conversation:
         {conversation}
@@ -133,12 +159,67 @@ class TaskCrossSessionManager(BaseCrossSessionManager):
         except Exception as e:
             logger.error(f"Error extracting task memories: {e}")
             return []
+    
+    async def extract_memories_batch(self, events_batch: List[List[Event]]) -> List[List[Dict]]:
+        """Extract the task memory of several executions with one LLM call"""
+        if len(events_batch) <= 1:
+            return await super().extract_memories_batch(events_batch)
+        
+        numbered = "\n\n".join(
+            f"Conversation {i}:\n{self._format_conversation(events)}"
+            for i, events in enumerate(events_batch)
+        )
+        messages = [
+            {"role": "system", "content": MEMORY_EXTRACT_PROMPT + BATCH_EXTRACT_INSTRUCTIONS},
+            {"role": "user", "content": numbered}
+        ]
+        response = await self.model.generate_structured(messages, BatchedTaskMemories)
+        if not isinstance(response, BatchedTaskMemories):
+            logger.error(f"Batched task extraction failed, extracting one by one: {response}")
+            return await super().extract_memories_batch(events_batch)
         
-    async def find_existing(self, memories: List[Dict], user_id: str) -> List[Dict[str, Any]]:
+        results: List[List[Dict]] = [[] for _ in events_batch]
+        for memory in response.memories:
+            if 0 <= memory.conversation_id < len(results) and not results[memory.conversation_id]:
+                results[memory.conversation_id].append(memory.model_dump(exclude={"conversation_id"}))
+        return results
+    
+    @staticmethod
+    def _format_conversation(events: List[Event]) -> str:
+        conversation_parts = []
+        
+        for event in events:
+            for item in event.content:
+                if isinstance(item, Message):
+                    conversation_parts.append(f"{item.role}: {item.content}")
+                elif isinstance(item, ToolCall):
+                    conversation_parts.append(f"{item.tool_call_id}: {item.name}")
+                elif isinstance(item, ToolResult):
+                    conversation_parts.append(f"{item.tool_call_id}: {item.name} {item.content}")
+        
+        return "\n".join(conversation_parts)
+        
+    def _search_text(self, memory: Dict) -> str:
+        return memory["problem"]
+    
+    def _make_add_action(self, memory: Dict, user_id: str) -> Dict[str, Any]:
+        # Convert dict to string for ChromaDB document field
+        memory_str = json.dumps(memory, ensure_ascii=False)
+        return {
+            "action": "ADD",
+            "memory": memory_str,
+            "user_id": user_id,
+            # Embedded by problem, in execute_memory_actions' batched call
+            "embed_text": memory["problem"],
+            "metadata": memory  # Store original dict in metadata
+        }
+    
+    async def find_existing(self, memories: List[Dict], user_id: str, matches: Optional[List[List[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        if matches is None:
+            queries = [self._search_text(memory) for memory in memories]
+            matches = await self.search_many(queries, user_id, limit=self.candidates_per_fact)
         existing_memories = []
-        for memory in memories:
-            query = memory["problem"]
-            results = await self.search(query, user_id)
+        for results in matches:
             if results:
                 existing_memories.append(results[0])
         return existing_memories
@@ -153,7 +234,42 @@ class TaskCrossSessionManager(BaseCrossSessionManager):
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
+        self._record_decide_prompt(messages, existing)
         action = await self.model.generate_structured(messages, MemoryAction)
+        return self._to_action_dicts(action, new_memory[0], user_id)
+    
+    async def extract_and_decide(self, events: List[Event], user_id: str) -> List[Dict[str, Any]]:
+        """Extract the task memory and decide its action with one LLM call.
+        
+        Candidates are the nearest task memories of the raw user turns, so
+        the task does not need to be extracted before searching.
+        """
+        turns = self._user_turns(events)
+        if not turns:
+            return []
+        
+        matches = await self.search_many(turns, user_id, limit=self.candidates_per_fact)
+        existing = self._merge_matches(matches)
+        user_prompt = f"""
+        Existing memory: {existing}
+        Conversation:
+        {self._format_conversation(events)}
+        """
+        messages = [
+            {"role": "system", "content": MEMORY_EXTRACT_PROMPT + MEMORY_ACTION_PROMPT + FUSED_INSTRUCTIONS},
+            {"role": "user", "content": user_prompt}
+        ]
+        self._record_decide_prompt(messages, existing)
+        self.stats.fused_calls += 1
+        response = await self.model.generate_structured(messages, FusedTaskUpdate)
+        if not isinstance(response, FusedTaskUpdate):
+            logger.error(f"Fused task memory update failed: {response}")
+            return []
+        if response.memory is None:
+            return []
+        return self._to_action_dicts(response.action, response.memory.model_dump(), user_id)
+    
+    def _to_action_dicts(self, action: MemoryAction, new_memory: Dict, user_id: str) -> List[Dict[str, Any]]:
         result = []
         if action.action == "UPDATE":
 
@@ -161,27 +277,17 @@ class TaskCrossSessionManager(BaseCrossSessionManager):
             if not memory_id:
                 logger.error("Cannot update memory: no memory_id available")
                 return []
-            embeddings = await self.model.embed(self.embedding_model, [new_memory[0]["problem"]])
             # Convert dict to string for ChromaDB document field
-            memory_str = json.dumps(new_memory[0], ensure_ascii=False)
+            memory_str = json.dumps(new_memory, ensure_ascii=False)
             result.append({
                 "action": "UPDATE",
                 "memory_id": memory_id,
                 "memory": memory_str,
-                "embedding": embeddings[0],
-                "metadata": new_memory[0]  # Store original dict in metadata
+                "embed_text": new_memory["problem"],
+                "metadata": new_memory  # Store original dict in metadata
             })
         elif action.action == "ADD":
-            embeddings = await self.model.embed(self.embedding_model, [new_memory[0]["problem"]])
-            # Convert dict to string for ChromaDB document field
-            memory_str = json.dumps(new_memory[0], ensure_ascii=False)
-            result.append({
-                "action": "ADD",
-                "memory": memory_str,
-                "user_id": user_id,
-                "embedding": embeddings[0],
-                "metadata": new_memory[0]  # Store original dict in metadata
-            })
+            result.append(self._make_add_action(new_memory, user_id))
         elif action.action == "DELETE":
             result.append({
                 "action": "DELETE",
@@ -191,4 +297,4 @@ class TaskCrossSessionManager(BaseCrossSessionManager):
             result.append({
                 "action": "NOOP"
             })
-        return result
\ No newline at end of file
+        return result
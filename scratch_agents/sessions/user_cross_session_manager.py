@@ -1,6 +1,4 @@
 import json
-import chromadb
-from chromadb.utils import embedding_functions
 from typing import List, Optional, Literal, Dict, Any
 from enum import Enum
 import uuid
@@ -38,6 +36,12 @@ Types of Information to Remember:
 7. **Location & Living Situation**: Where they live, recent moves, living arrangements
 """
 
+BATCH_EXTRACT_INSTRUCTIONS = """
+You are given several numbered conversations from different users.
+Extract facts for each conversation separately and tag them with its conversation number.
+Never mix facts between conversations.
+"""
+
 MEMORY_ACTION_PROMPT = """
 You are a User Memory Action Decider specializing in accurately managing user facts and preferences.
 
@@ -64,6 +68,13 @@ Actions:
 - NOOP: Skip if the information is already stored or not relevant
 """
 
+FUSED_INSTRUCTIONS = """
+You are given the existing memories of the user and a new conversation.
+First extract the facts about the user from the conversation, following the extraction rules.
+Then decide the actions for these facts against the existing memories, following the action rules.
+Return no actions when there are no facts.
+"""
+
 class MemoryAction(BaseModel):
     """Structured output for memory action decision"""
     action: Literal["ADD", "UPDATE", "DELETE", "NOOP"] = Field(
@@ -88,24 +99,48 @@ class MemoryFacts(BaseModel):
         description="A list of facts about the user"
     )
 
+class FusedMemoryUpdate(BaseModel):
+    """Facts from a conversation and the actions that store them"""
+    facts: List[str] = Field(
+        description="A list of facts about the user"
+    )
+    actions: List[MemoryAction] = Field(
+        description="A list of memory actions for the facts"
+    )
+
+class ConversationFacts(BaseModel):
+    """Facts about the user from one conversation of a batch"""
+    conversation_id: int = Field(
+        description="The number of the conversation the facts come from"
+    )
+    facts: List[str] = Field(
+        description="A list of facts about the user"
+    )
+
+class BatchedMemoryFacts(BaseModel):
+    """Facts about the users of several conversations"""
+    conversations: List[ConversationFacts] = Field(
+        description="Facts per conversation; omit conversations without facts"
+    )
+
 class UserCrossSessionManager(BaseCrossSessionManager):
-    """Manage memories across sessions using ChromaDB"""
+    """Manage memories across sessions in a vector store"""
     
-    def __init__(self, model, collection_name="user_memory", persist_directory="./cross_session_db", embedding_model="text-embedding-3-small"):
+    def __init__(self, model, collection_name="user_memory", persist_directory="./cross_session_db", embedding_model="text-embedding-3-small", vector_store=None,
+                 candidates_per_fact: int = 5, max_candidate_tokens: int = 2000,
+                 noop_distance: Optional[float] = None, add_distance: Optional[float] = None,
+                 fused: bool = False):
         # Initialize base class first
-        super().__init__(model, collection_name, persist_directory, embedding_model)
+        super().__init__(model, collection_name, persist_directory, embedding_model, vector_store=vector_store,
+                         noop_distance=noop_distance, add_distance=add_distance, fused=fused)
+        # Bound the existing memories shown to decide_actions, however many the user has
+        self.candidates_per_fact = candidates_per_fact
+        self.max_candidate_tokens = max_candidate_tokens
 
     async def extract_memories(self, events: List[Any]) -> List[str]:
         """Extract important information from execution events using LLM"""
         
-        conversation_parts = []
-        for event in events:
-            for item in event.content:
-                if hasattr(item, 'role') and hasattr(item, 'content'):
-                    if item.role == 'user':
-                        conversation_parts.append(f"User: {item.content}")
-        
-        conversation = "\n".join(conversation_parts)
+        conversation = self._format_conversation(events)
         
         if not conversation.strip():
             return []
@@ -129,36 +164,68 @@ class UserCrossSessionManager(BaseCrossSessionManager):
         except Exception as e:
             logger.error(f"Error extracting facts: {e}")
             return []
+    
+    async def extract_memories_batch(self, events_batch: List[List[Any]]) -> List[List[str]]:
+        """Extract facts of several executions with one LLM call"""
+        conversations = [self._format_conversation(events) for events in events_batch]
+        pending = [i for i, conversation in enumerate(conversations) if conversation.strip()]
+        results: List[List[str]] = [[] for _ in events_batch]
+        if len(pending) <= 1:
+            for i in pending:
+                results[i] = await self.extract_memories(events_batch[i])
+            return results
+        
+        numbered = "\n\n".join(
+            f"Conversation {i}:\n{conversations[i]}" for i in pending
+        )
+        messages = [
+            {"role": "system", "content": MEMORY_EXTRACT_PROMPT + BATCH_EXTRACT_INSTRUCTIONS},
+            {"role": "user", "content": numbered}
+        ]
+        response = await self.model.generate_structured(messages, BatchedMemoryFacts)
+        if not isinstance(response, BatchedMemoryFacts):
+            logger.error(f"Batched fact extraction failed, extracting one by one: {response}")
+            return await super().extract_memories_batch(events_batch)
+        
+        for entry in response.conversations:
+            if entry.conversation_id in pending:
+                results[entry.conversation_id].extend(entry.facts)
+        return results
+    
+    @staticmethod
+    def _format_conversation(events: List[Any]) -> str:
+        conversation_parts = []
+        for event in events:
+            for item in event.content:
+                if hasattr(item, 'role') and hasattr(item, 'content'):
+                    if item.role == 'user':
+                        conversation_parts.append(f"User: {item.content}")
+        return "\n".join(conversation_parts)
 
     async def find_existing(
         self,
         memories: List[str],
-        user_id: str
+        user_id: str,
+        matches: Optional[List[List[Dict[str, Any]]]] = None
     ) -> List[Dict[str, Any]]:
-        """Find existing memories.
+        """Find the existing memories closest to the new facts.
+        
+        The nearest candidates_per_fact memories of every fact are searched
+        in one batch and deduplicated. They are taken round-robin, nearest
+        first, so each fact keeps its closest matches, until
+        max_candidate_tokens is reached.
         
         Args:
+            memories: New facts
             user_id: User identifier
+            matches: search_many results of the facts, when already searched
             
         Returns:
             List of existing memories with metadata including timestamps
         """
-        existing_memories = []
-        results = self.collection.get(
-            where={"user_id": user_id},
-            include=["documents", "metadatas"]
-        )
-        if results["documents"]:
-            for i, doc in enumerate(results["documents"]):
-                metadata = results["metadatas"][i] if results["metadatas"] else {}
-                existing_memories.append({
-                    "id": results["ids"][i],
-                    "content": doc,
-                    "metadata": metadata,
-                    "created_at": metadata.get("created_at", "Unknown"),
-                    "updated_at": metadata.get("updated_at", "Unknown")
-                })
-        return existing_memories
+        if matches is None:
+            matches = await self.search_many(memories, user_id, limit=self.candidates_per_fact)
+        return self._merge_matches(matches)
     
     async def decide_actions(self, new_memories: List[str], existing: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
         """Decide actions for new memories."""
@@ -172,9 +239,44 @@ class UserCrossSessionManager(BaseCrossSessionManager):
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
+        self._record_decide_prompt(messages, existing)
         actions = await self.model.generate_structured(messages, MemoryActions)
+        return self._to_action_dicts(actions.actions, user_id)
+    
+    async def extract_and_decide(self, events: List[Any], user_id: str) -> List[Dict[str, Any]]:
+        """Extract facts and decide their actions with one LLM call.
+        
+        Candidates are the nearest memories of the raw user turns, so no
+        facts need to be extracted before searching.
+        """
+        turns = self._user_turns(events)
+        if not turns:
+            return []
+        
+        matches = await self.search_many(turns, user_id, limit=self.candidates_per_fact)
+        existing = self._merge_matches(matches)
+        user_prompt = f"""
+        Existing memory: {existing}
+        Conversation:
+        {self._format_conversation(events)}
+        """
+        messages = [
+            {"role": "system", "content": MEMORY_EXTRACT_PROMPT + MEMORY_ACTION_PROMPT + FUSED_INSTRUCTIONS},
+            {"role": "user", "content": user_prompt}
+        ]
+        self._record_decide_prompt(messages, existing)
+        self.stats.fused_calls += 1
+        response = await self.model.generate_structured(messages, FusedMemoryUpdate)
+        if not isinstance(response, FusedMemoryUpdate):
+            logger.error(f"Fused memory update failed: {response}")
+            return []
+        logger.debug(f"Extracted facts: {response.facts}")
+        return self._to_action_dicts(response.actions, user_id)
+    
+    @staticmethod
+    def _to_action_dicts(actions: List[MemoryAction], user_id: str) -> List[Dict[str, Any]]:
         result = []
-        for action in actions.actions:
+        for action in actions:
             action_dict = action.model_dump()
             if action_dict["action"] == "ADD":
                 action_dict["user_id"] = user_id
@@ -0,0 +1,497 @@
+"""Vector stores behind the cross-session memory managers."""
+
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore(ABC):
+    """Storage and similarity search of memory vectors
+
+    Results use the shapes of a ChromaDB collection: get() returns flat
+    "ids", "documents" and "metadatas" lists, query() returns one list per
+    query embedding under the same keys plus "distances" (cosine
+    distance). A where filter is a dict of metadata values that must all
+    match, e.g. {"user_id": "alice"}.
+    """
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+    ) -> None:
+        """Insert new records or replace the records with the same ids"""
+        pass
+
+    @abstractmethod
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, List[Any]]:
+        """Records by id and/or metadata filter"""
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, List[List[Any]]]:
+        """The n_results nearest records of each query embedding"""
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete records; unknown ids are ignored"""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored records"""
+        pass
+
+
+class ChromaVectorStore(VectorStore):
+    """A persistent ChromaDB collection
+
+    chromadb is imported here rather than at module level, so managers
+    using another store do not need it installed.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        collection_name: str,
+        embedding_model: str = "text-embedding-3-small",
+    ):
+        import chromadb
+        from chromadb.utils import embedding_functions
+
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+        )
+        # Documents and queries are always embedded by the manager; the
+        # collection keeps its embedding function for compatibility only
+        embedding_function = embedding_functions.OpenAIEmbeddingFunction(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model_name=embedding_model
+        )
+
+        try:
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=embedding_function
+            )
+            logger.info(f"Using existing collection: {collection_name}")
+        except Exception:
+            logger.error(f"Error getting or creating collection: {collection_name}")
+            raise
+
+    def upsert(self, ids, documents, embeddings, metadatas) -> None:
+        self.collection.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def get(self, ids=None, where=None) -> Dict[str, List[Any]]:
+        return self.collection.get(ids=ids, where=where, include=["documents", "metadatas"])
+
+    def query(self, query_embeddings, n_results=5, where=None) -> Dict[str, List[List[Any]]]:
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class LocalVectorStore(VectorStore):
+    """A file-backed vector index using NumPy, with no external service
+
+    Layout of the directory at path:
+
+    - vectors-<generation>.f32: memory-mapped float32 matrix with one
+      unit-normalised row per record, grown in doubling steps
+    - records-<generation>.jsonl: append-only log of puts (id, row,
+      document, metadata) and deletes
+    - meta.json: dimension and current generation; replacing it is the
+      commit point of a compaction
+
+    Writes only append: an upsert of an existing id writes a new row and
+    sets the old row in the tombstone bitmap, as does a delete. When the
+    share of dead rows exceeds compact_ratio, live rows are copied into a
+    new generation. Queries are one matrix product over the rows that
+    pass the tombstone bitmap and the where filter; user_id filters use
+    an integer code per row, so they are vectorised too.
+
+    Args:
+        path: Directory of the index files
+        compact_ratio: Share of dead rows that triggers compaction
+        min_compact_rows: Never compact indexes smaller than this
+        initial_capacity: Rows allocated when the matrix is created
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compact_ratio: float = 0.3,
+        min_compact_rows: int = 1024,
+        initial_capacity: int = 1024,
+    ):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.min_compact_rows = min_compact_rows
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        self.dim: Optional[int] = meta.get("dim")
+        self.generation: int = meta.get("generation", 0)
+        self._reset()
+        self._load()
+
+    # ---- VectorStore ----
+
+    def upsert(self, ids, documents, embeddings, metadatas) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("upsert needs one embedding per id")
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            start = self._rows
+            self._ensure_capacity(start + len(ids))
+            self._vectors[start:start + len(ids)] = _normalise(vectors)
+            self._vectors.flush()
+
+            # Vectors are written first; a record in the log commits the row
+            lines = []
+            for offset, (memory_id, document, metadata) in enumerate(zip(ids, documents, metadatas)):
+                record = {"op": "put", "id": memory_id, "row": start + offset, "document": document, "metadata": metadata or {}}
+                lines.append(json.dumps(record))
+                self._apply(record)
+            self._append_log(lines)
+            self._maybe_compact()
+
+    def get(self, ids=None, where=None) -> Dict[str, List[Any]]:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[memory_id] for memory_id in ids if memory_id in self._row_of]
+                if where:
+                    mask = self._mask(where)
+                    rows = [row for row in rows if mask[row]]
+            else:
+                rows = np.flatnonzero(self._mask(where)).tolist()
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+            }
+
+    def query(self, query_embeddings, n_results=5, where=None) -> Dict[str, List[List[Any]]]:
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if not len(query_embeddings):
+            return results
+        queries = _normalise(np.asarray(query_embeddings, dtype=np.float32))
+        with self._lock:
+            candidates = np.flatnonzero(self._mask(where))
+            k = min(n_results, len(candidates))
+            if k == 0:
+                for key in results:
+                    results[key] = [[] for _ in range(len(queries))]
+                return results
+
+            if len(candidates) == self._rows:
+                matrix = self._vectors[:self._rows]
+            else:
+                matrix = self._vectors[candidates]
+            similarities = queries @ matrix.T
+
+            # argpartition finds the top k in linear time; only those are sorted
+            if k < similarities.shape[1]:
+                top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(similarities.shape[1]), (len(queries), 1))
+            top_similarities = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_similarities, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+
+            for row_positions, row_similarities in zip(top, top_similarities):
+                rows = candidates[row_positions]
+                results["ids"].append([self._ids[row] for row in rows])
+                results["documents"].append([self._documents[row] for row in rows])
+                results["metadatas"].append([self._metadatas[row] for row in rows])
+                results["distances"].append((1.0 - row_similarities).tolist())
+            return results
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            lines = []
+            for memory_id in ids:
+                if memory_id in self._row_of:
+                    record = {"op": "delete", "id": memory_id}
+                    lines.append(json.dumps(record))
+                    self._apply(record)
+            if lines:
+                self._append_log(lines)
+                self._maybe_compact()
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    # ---- maintenance ----
+
+    def compact(self) -> None:
+        """Copy the live rows into a new generation and drop the old files"""
+        with self._lock:
+            live = np.flatnonzero(~self._tombstones[:self._rows])
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            capacity = max(self.initial_capacity, _next_capacity(len(live)))
+
+            if self.dim is not None:
+                vectors = self._open_vectors(new_generation, capacity, create=True)
+                vectors[:len(live)] = self._vectors[live]
+                vectors.flush()
+                del vectors
+            with open(self._log_path(new_generation), "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(live):
+                    record = {
+                        "op": "put",
+                        "id": self._ids[row],
+                        "row": new_row,
+                        "document": self._documents[row],
+                        "metadata": self._metadatas[row],
+                    }
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.generation = new_generation
+            self._write_meta()
+            self._close_files()
+            for old_file in (self._vectors_path(old_generation), self._log_path(old_generation)):
+                if os.path.exists(old_file):
+                    os.remove(old_file)
+
+            self._reset()
+            self._load()
+            logger.info(f"Compacted vector index {self.path}: {len(live)} live rows")
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_files()
+
+    @property
+    def dead_rows(self) -> int:
+        return int(self._tombstones[:self._rows].sum())
+
+    # ---- internals ----
+
+    def _reset(self) -> None:
+        self._rows = 0
+        self._capacity = 0
+        self._vectors = None
+        self._log = None
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        self._tombstones = np.zeros(0, dtype=bool)
+        self._user_codes = np.zeros(0, dtype=np.int32)
+        self._user_code_of: Dict[str, int] = {}
+
+    def _load(self) -> None:
+        """Open the current generation and replay its log"""
+        if self.dim is not None:
+            vectors_path = self._vectors_path(self.generation)
+            rows_on_disk = os.path.getsize(vectors_path) // (4 * self.dim) if os.path.exists(vectors_path) else 0
+            self._capacity = max(self.initial_capacity, rows_on_disk)
+            self._vectors = self._open_vectors(self.generation, self._capacity, create=not rows_on_disk)
+            self._grow_arrays(self._capacity)
+
+        log_path = self._log_path(self.generation)
+        if os.path.exists(log_path):
+            self._truncate_torn_record(log_path)
+            with open(log_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted write
+                        logger.warning(f"Skipping unreadable record in {log_path}")
+                        continue
+                    self._apply(record)
+        self._log = open(log_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _truncate_torn_record(log_path: str) -> None:
+        """Cut a last record left without its newline by an interrupted write
+
+        Otherwise the next appended record would continue the torn line and
+        be lost with it on the next load.
+        """
+        with open(log_path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Scan back in blocks for the end of the last complete record
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            logger.warning(f"Dropping torn last record of {log_path}")
+            f.truncate(end)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        memory_id = record["id"]
+        previous = self._row_of.pop(memory_id, None)
+        if previous is not None:
+            self._tombstones[previous] = True
+        if record["op"] != "put":
+            return
+
+        row = record["row"]
+        if row >= len(self._ids):
+            missing = row + 1 - len(self._ids)
+            self._ids.extend([None] * missing)
+            self._documents.extend([None] * missing)
+            self._metadatas.extend([None] * missing)
+        metadata = record["metadata"]
+        self._ids[row] = memory_id
+        self._documents[row] = record["document"]
+        self._metadatas[row] = metadata
+        self._row_of[memory_id] = row
+        self._tombstones[row] = False
+        self._user_codes[row] = self._user_code(metadata.get("user_id"))
+        self._rows = max(self._rows, row + 1)
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean mask of the live rows that match where"""
+        mask = ~self._tombstones[:self._rows]
+        for key, value in (where or {}).items():
+            if key == "user_id":
+                code = self._user_code_of.get(value)
+                if code is None:
+                    return np.zeros(self._rows, dtype=bool)
+                mask &= self._user_codes[:self._rows] == code
+            else:
+                mask &= np.fromiter(
+                    ((metadata or {}).get(key) == value for metadata in self._metadatas[:self._rows]),
+                    dtype=bool,
+                    count=self._rows,
+                )
+        return mask
+
+    def _user_code(self, user_id: Optional[str]) -> int:
+        if user_id is None:
+            return -1
+        return self._user_code_of.setdefault(user_id, len(self._user_code_of))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity and self._vectors is not None:
+            return
+        capacity = max(self.initial_capacity, _next_capacity(rows), self._capacity)
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        self._vectors = self._open_vectors(self.generation, capacity, create=False)
+        self._capacity = capacity
+        self._grow_arrays(capacity)
+
+    def _grow_arrays(self, capacity: int) -> None:
+        grow = capacity - len(self._tombstones)
+        if grow > 0:
+            # Unused rows count as dead until a put claims them
+            self._tombstones = np.concatenate([self._tombstones, np.ones(grow, dtype=bool)])
+            self._user_codes = np.concatenate([self._user_codes, np.full(grow, -1, dtype=np.int32)])
+
+    def _open_vectors(self, generation: int, capacity: int, create: bool) -> np.memmap:
+        path = self._vectors_path(generation)
+        size = capacity * self.dim * 4
+        with open(path, "w+b" if create or not os.path.exists(path) else "r+b") as f:
+            if os.fstat(f.fileno()).st_size < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _append_log(self, lines: List[str]) -> None:
+        self._log.write("\n".join(lines) + "\n")
+        self._log.flush()
+
+    def _maybe_compact(self) -> None:
+        dead = self._rows - len(self._row_of)
+        if self._rows >= self.min_compact_rows and dead > self.compact_ratio * self._rows:
+            self.compact()
+
+    def _close_files(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+
+    def _read_meta(self) -> Dict[str, Any]:
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return {}
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self) -> None:
+        meta_path = os.path.join(self.path, "meta.json")
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "generation": self.generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, meta_path)
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"vectors-{generation}.f32")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"records-{generation}.jsonl")
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _next_capacity(rows: int) -> int:
+    capacity = 1
+    while capacity < rows:
+        capacity *= 2
+    return capacity
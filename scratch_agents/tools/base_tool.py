@@ -1,5 +1,7 @@
 from typing import Any, Dict, Type, Union, Optional
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+import asyncio
 import json
 from .schema_utils import format_tool_definition
 from ..agents.execution_context_ch6 import ExecutionContext
@@ -14,12 +16,22 @@ class BaseTool(ABC):
         description: str = None, 
         tool_definition: Optional[Union[Dict[str, Any], str]] = None,
         pydantic_input_model: Type = None,
-        output_type: str = "str"
+        output_type: str = "str",
+        max_concurrency: Optional[int] = None,
+        sequential: bool = False
     ):
         self.name = name or self.__class__.__name__
         self.description = description or self.__doc__ or ""
         self.pydantic_input_model = pydantic_input_model
         self.output_type = output_type
+        # Concurrency hints used when the agent runs tool calls in parallel:
+        # max_concurrency caps simultaneous executions of this tool, and a
+        # sequential tool never runs alongside any other tool call.
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.sequential = sequential
+        self._semaphore = None
         
         if isinstance(tool_definition, str):
             self._tool_definition = json.loads(tool_definition)
@@ -48,6 +60,14 @@ class BaseTool(ABC):
         else:
             return None
     
+    def concurrency_slot(self):
+        """Async context manager that enforces max_concurrency for this tool"""
+        if self.max_concurrency is None:
+            return nullcontext()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
     async def __call__(self, **kwargs) -> Any:
         return await self.execute(**kwargs)
     
@@ -1,4 +1,4 @@
-from typing import Callable, Union, Dict, Any
+from typing import Callable, Union, Dict, Any, Optional
 from .function_tool import FunctionTool
 
 def tool(
@@ -6,7 +6,10 @@ def tool(
     *,
     name: str = None,
     description: str = None,
-    tool_definition: Union[Dict[str, Any], str] = None
+    tool_definition: Union[Dict[str, Any], str] = None,
+    max_concurrency: Optional[int] = None,
+    sequential: bool = False,
+    coalesce: bool = False
 ) -> Union[Callable, FunctionTool]:
     
     def decorator(f: Callable) -> FunctionTool:
@@ -14,7 +17,10 @@ def tool(
             func=f,
             name=name,
             description=description,
-            tool_definition=tool_definition
+            tool_definition=tool_definition,
+            max_concurrency=max_concurrency,
+            sequential=sequential,
+            coalesce=coalesce
         )
     
     if func is not None:
@@ -1,8 +1,10 @@
 from typing import Any, Dict, Type, Union, Callable, Optional, get_type_hints
 import inspect
 import asyncio
+import json
 from .base_tool import BaseTool
 from .schema_utils import format_tool_definition, function_to_input_schema
+from ..models.single_flight import SingleFlight
 
 class FunctionTool(BaseTool):
     
@@ -12,9 +14,16 @@ class FunctionTool(BaseTool):
         name: str = None, 
         description: str = None,
         tool_definition: Union[Dict[str, Any], str] = None,
-        output_type: str = None
+        output_type: str = None,
+        max_concurrency: Optional[int] = None,
+        sequential: bool = False,
+        coalesce: bool = False
     ):
         self.func = func
+        # Identical concurrent calls share one execution; only safe for
+        # read-only tools whose result does not depend on the caller
+        self.coalesce = coalesce
+        self._single_flight = SingleFlight() if coalesce else None
         self.pydantic_input_model = self._detect_pydantic_model(func)
         
         name = name or func.__name__
@@ -28,10 +37,18 @@ class FunctionTool(BaseTool):
             description=description, 
             tool_definition=tool_definition,
             pydantic_input_model=self.pydantic_input_model,
-            output_type=output_type
+            output_type=output_type,
+            max_concurrency=max_concurrency,
+            sequential=sequential
         )
     
     async def execute(self, context, **kwargs) -> Any:
+        if self._single_flight is not None:
+            key = json.dumps(kwargs, sort_keys=True, default=str)
+            return await self._single_flight.do(key, lambda: self._execute(context, **kwargs))
+        return await self._execute(context, **kwargs)
+    
+    async def _execute(self, context, **kwargs) -> Any:
         sig = inspect.signature(self.func)
         expects_context = 'context' in sig.parameters
         
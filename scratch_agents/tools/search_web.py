@@ -2,7 +2,7 @@ import os
 from .decorator import tool
 from tavily import TavilyClient
 
-@tool
+@tool(coalesce=True)
 def search_web(query: str, max_results: int = 2) -> str:
     """Search the web for information about a given query"""
     api_key = os.getenv("TAVILY_API_KEY")
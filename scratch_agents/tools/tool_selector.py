@@ -0,0 +1,189 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ..models.rate_limiter import estimate_tokens
+from ..types.contents import ToolCall, ToolResult
+
+# Long tool outputs only dilute the query
+MAX_QUERY_PART_CHARS = 2000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, splitting snake_case and camelCase identifiers"""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [token for token in re.split(r"[^a-z0-9]+", text.lower()) if len(token) > 1]
+
+
+def tool_document(definition: Dict[str, Any]) -> str:
+    """Searchable text of a tool: name, description and parameter docs"""
+    function = definition.get("function", definition)
+    parts = [function.get("name", ""), function.get("description", "")]
+    for name, schema in (function.get("parameters") or {}).get("properties", {}).items():
+        parts.append(name)
+        parts.append(schema.get("description", ""))
+    return " ".join(part for part in parts if part)
+
+
+class BM25Index:
+    """Okapi BM25 over a small fixed set of documents"""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        terms = [term for term in tokenize(query) if term in self.idf]
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            for term in terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+@dataclass
+class ToolSelectionStats:
+    """Token savings of a ToolSelector across requests"""
+    selections: int = 0
+    index_builds: int = 0
+    tool_tokens_before: int = 0
+    tool_tokens_after: int = 0
+
+    @property
+    def tool_tokens_saved(self) -> int:
+        return self.tool_tokens_before - self.tool_tokens_after
+
+    @property
+    def savings_ratio(self) -> float:
+        return self.tool_tokens_saved / self.tool_tokens_before if self.tool_tokens_before else 0.0
+
+
+class ToolSelector:
+    """Send the model only the tools relevant to the recent conversation
+
+    Tools are ranked by BM25 over their names, descriptions and parameter
+    docs, optionally blended with embedding similarity. The index is built
+    once per tool set. Pinned tools (final_answer by default) and tools
+    called in the recent window are always kept.
+
+    Example:
+        agent = ToolCallingAgent(..., tools=mcp_tools, tool_selector=ToolSelector(top_k=8))
+
+    Args:
+        top_k: Number of ranked tools to send, not counting pinned or recently used tools
+        pinned: Names of tools that are always sent
+        embedder: Optional EmbeddingService for semantic matching
+        embedding_weight: Share of the embedding similarity in the blended score
+        window: Number of recent content items used as the query
+    """
+
+    def __init__(
+        self,
+        top_k: int = 5,
+        pinned: Iterable[str] = ("final_answer",),
+        embedder=None,
+        embedding_weight: float = 0.5,
+        window: int = 4,
+    ):
+        self.top_k = top_k
+        self.pinned = set(pinned)
+        self.embedder = embedder
+        self.embedding_weight = embedding_weight
+        self.window = window
+        self.stats = ToolSelectionStats()
+        self._index = None
+
+    async def select(self, tools_dict: Dict[str, Any], contents: List[Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Pick the tools to send
+
+        Returns:
+            The selected tools_dict and a report of the selection
+        """
+        names, token_counts, bm25, tool_vectors = await self._get_index(tools_dict)
+        tokens_before = sum(token_counts)
+
+        recent = contents[-self.window:]
+        recently_used = {item.name for item in recent if isinstance(item, (ToolCall, ToolResult))}
+        keep = {name for name in names if name in self.pinned or name in recently_used}
+
+        if len(names) - len(keep) > self.top_k:
+            scores = await self._score(self._query(recent), bm25, tool_vectors)
+            ranked = sorted(
+                (i for i, name in enumerate(names) if name not in keep),
+                key=lambda i: scores[i],
+                reverse=True,
+            )
+            keep.update(names[i] for i in ranked[:self.top_k])
+            selected = {name: tool for name, tool in tools_dict.items() if name in keep}
+        else:
+            selected = tools_dict
+
+        tokens_after = sum(count for name, count in zip(names, token_counts) if name in selected)
+        self.stats.selections += 1
+        self.stats.tool_tokens_before += tokens_before
+        self.stats.tool_tokens_after += tokens_after
+        report = {
+            "selected": list(selected),
+            "available": len(names),
+            "tool_tokens_before": tokens_before,
+            "tool_tokens_after": tokens_after,
+            "tool_tokens_saved": tokens_before - tokens_after,
+        }
+        return selected, report
+
+    async def _get_index(self, tools_dict: Dict[str, Any]):
+        """Return the index of the tool set, rebuilt only when the tools change"""
+        key = tuple(tools_dict.items())
+        if self._index is None or self._index[0] != key:
+            names = list(tools_dict)
+            definitions = [tools_dict[name].tool_definition for name in names]
+            documents = [tool_document(definition) for definition in definitions]
+            token_counts = [estimate_tokens(json.dumps(definition)) for definition in definitions]
+            tool_vectors = await self.embedder.embed(documents) if self.embedder and documents else None
+            self._index = (key, (names, token_counts, BM25Index(documents), tool_vectors))
+            self.stats.index_builds += 1
+        return self._index[1]
+
+    def _query(self, recent: List[Any]) -> str:
+        parts = []
+        for item in recent:
+            if isinstance(item, ToolCall):
+                parts.append(f"{item.name} {json.dumps(item.arguments)}")
+            else:
+                parts.append(item.content[:MAX_QUERY_PART_CHARS])
+        return " ".join(parts)
+
+    async def _score(self, query: str, bm25: BM25Index, tool_vectors) -> List[float]:
+        scores = bm25.scores(query)
+        top = max(scores, default=0.0)
+        if top > 0:
+            scores = [score / top for score in scores]
+        if tool_vectors is None or not query:
+            return scores
+        query_vector = await self.embedder.embed_one(query)
+        similarities = [_cosine(query_vector, vector) for vector in tool_vectors]
+        w = self.embedding_weight
+        return [(1 - w) * score + w * similarity for score, similarity in zip(scores, similarities)]
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
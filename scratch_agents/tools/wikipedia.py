@@ -1,12 +1,12 @@
 import wikipedia
 from .decorator import tool
 
-@tool
+@tool(coalesce=True)
 def search_wikipedia(query: str) -> str:
     """Search Wikipedia for information about a given query"""
     return wikipedia.search(query)
 
-@tool
+@tool(coalesce=True)
 def get_wikipedia_page(page_name: str) -> str:
     """Get the content of a Wikipedia page"""
     return wikipedia.page(page_name).content
\ No newline at end of file
@@ -0,0 +1,26 @@
+from typing import Any, Literal, Union
+from pydantic import BaseModel
+from .contents import ToolCall, ToolResult
+
+
+class TokenDelta(BaseModel):
+    """A piece of assistant text as it arrives from the model"""
+    type: Literal["token_delta"] = "token_delta"
+    text: str
+
+class ToolCallEvent(BaseModel):
+    """A tool call whose arguments have been fully received"""
+    type: Literal["tool_call"] = "tool_call"
+    tool_call: ToolCall
+
+class ToolResultEvent(BaseModel):
+    """The result of executing a tool call"""
+    type: Literal["tool_result"] = "tool_result"
+    tool_result: ToolResult
+
+class FinalResultEvent(BaseModel):
+    """The final result of an agent run"""
+    type: Literal["final_result"] = "final_result"
+    output: Any
+
+StreamEvent = Union[TokenDelta, ToolCallEvent, ToolResultEvent, FinalResultEvent]